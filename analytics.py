@@ -0,0 +1,184 @@
+#Shared analytics for all eleven visualizations
+#Everything the views need - yearly and monthly means, the 90-day rolling mean/std, the extremes and the
+#regression line - is computed in one vectorized pass over the NumPy arrays instead of a groupby, two
+#rolling passes, idxmax/idxmin and polyfit each scanning the frame (and adding columns to it).
+#The result is an immutable Analytics tuple with read-only arrays, used by both apps.
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOW = 90
+#Rows per block of window_moments sums, and the relative rounding noise of a sum of squares (a few hundred ulps)
+MOMENT_BLOCK = 1 << 14
+MOMENT_NOISE = 256 * np.finfo(np.float64).eps
+
+Analytics = namedtuple("Analytics", [
+    "dates", "rates", "days", "years",
+    "rolling_mean", "volatility",
+    "annual_avg", "monthly_avg",
+    "highest", "lowest", "regression",
+])
+
+#Sufficient statistics of the Rate-vs-days fit plus the fitted line
+Regression = namedtuple("Regression", [
+    "n", "sum_x", "sum_y", "sum_xx", "sum_xy", "sum_yy", "slope", "intercept",
+])
+
+#Rate and date of an extreme, plus its row position
+Extreme = namedtuple("Extreme", ["index", "rate", "date"])
+
+
+def _read_only(a):
+    a = np.asarray(a)
+    if a.flags.writeable:
+        a = a.view()
+        a.flags.writeable = False
+    return a
+
+
+def calendar_years(dates):
+    return (np.asarray(dates).astype("datetime64[Y]").astype(np.int64) + 1970).astype(np.int32)
+
+
+#Days since the first observation
+def day_offsets(dates, origin=None):
+    days = np.asarray(dates).astype("datetime64[D]").astype(np.int64)
+    if origin is None:
+        origin = days[0] if len(days) else 0
+    return days - origin
+
+
+#Rolling mean and sample std (ddof=1) of several windows from cumulative sums
+#Each entry of `starts` holds the first row of every row's window (any non-decreasing starts, so calendar
+#windows work too); returns [(mean, std)] in the same order, with std NaN where the window has one row.
+#The rows are taken in blocks of at least MOMENT_BLOCK rows (and at least the widest window), and each block's
+#sums are formed over just the rows its windows reach, shifted by the block's first value - so the sums stay
+#the size of a few windows' local deviations however long the series is. Variances below the rounding noise
+#of those sums are reported as 0 (flat windows).
+#`segment_starts` (index of each row's first row in its own series) lets several series laid end to end
+#be rolled in one call without windows crossing from one series into the next
+def window_moments(rates, starts, segment_starts=None):
+    y = np.asarray(rates, dtype=np.float64)
+    n = len(y)
+    if n == 0:
+        return [(np.empty(0), np.empty(0)) for _ in starts]
+    if segment_starts is None:
+        segment_starts = np.zeros(n, dtype=np.int64)
+    starts = [np.maximum(start, segment_starts) for start in starts]
+    end = np.arange(1, n + 1)
+    block = max(MOMENT_BLOCK, max(int((end - start).max()) for start in starts))
+    results = [(np.empty(n), np.empty(n)) for _ in starts]
+    for lo in range(0, n, block):
+        hi = min(n, lo + block)
+        #Starts never decrease, so the block's first row has the earliest window start
+        first = min(int(start[lo]) for start in starts)
+        shift = y[lo]
+        local = y[first:hi] - shift
+        c1 = np.concatenate(([0.0], np.cumsum(local)))
+        c2 = np.concatenate(([0.0], np.cumsum(local * local)))
+        e = end[lo:hi] - first
+        for (mean, std), start in zip(results, starts):
+            a = start[lo:hi] - first
+            k = (e - a).astype(np.float64)
+            s1 = c1[e] - c1[a]
+            s2 = c2[e] - c2[a]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                spread = s2 - s1 * s1 / k
+                spread = np.where(spread > MOMENT_NOISE * s2, spread, 0.0)
+                var = np.where(k > 1, spread / (k - 1), np.nan)
+            mean[lo:hi] = s1 / k + shift
+            std[lo:hi] = np.sqrt(var)
+    return results
+
+
+#Rolling mean and sample std (ddof=1) of the last `window` rows, with min_periods=1
+def rolling_moments(rates, window=ROLLING_WINDOW, segment_starts=None):
+    n = len(rates)
+    return window_moments(rates, [np.arange(1, n + 1) - window], segment_starts)[0]
+
+
+#Per-year and per-(year, month) sums and counts via bincount
+#Returns the first year, year sums/counts and (years x 12) month sums/counts
+def period_sums(dates, rates):
+    months = np.asarray(dates).astype("datetime64[M]").astype(np.int64)
+    base = int(months.min() // 12) if len(months) else 0
+    code = months - base * 12
+    first_year = 1970 + base
+    n_years = int(code.max() // 12) + 1 if len(code) else 0
+    y = np.asarray(rates, dtype=np.float64)
+    month_sum = np.bincount(code, weights=y, minlength=n_years * 12).reshape(n_years, 12)
+    month_count = np.bincount(code, minlength=n_years * 12).reshape(n_years, 12)
+    return first_year, month_sum.sum(axis=1), month_count.sum(axis=1), month_sum, month_count
+
+
+#annual_avg in the same shape as groupby("Year")["Rate"].mean().reset_index()
+def annual_frame(first_year, year_sum, year_count):
+    present = year_count > 0
+    years = np.arange(first_year, first_year + len(year_count))[present]
+    return pd.DataFrame({"Year": years, "Rate": year_sum[present] / year_count[present]})
+
+
+#monthly_avg in the same shape as groupby(["Year", "Month"])["Rate"].mean().unstack()
+def monthly_frame(first_year, month_sum, month_count):
+    present = month_count.sum(axis=1) > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = np.where(month_count > 0, month_sum / np.maximum(month_count, 1), np.nan)
+    years = np.arange(first_year, first_year + len(month_count))[present]
+    months = month_count[present].sum(axis=0) > 0
+    return pd.DataFrame(avg[present][:, months],
+                        index=pd.Index(years, name="Year"),
+                        columns=pd.Index(np.arange(1, 13)[months], name="Month"))
+
+
+def regression_sums(x, y):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    return (len(x), x.sum(), y.sum(), np.dot(x, x), np.dot(x, y), np.dot(y, y))
+
+
+#Least-squares line from the sufficient statistics (same answer as np.polyfit(x, y, 1))
+def fit_line(n, sum_x, sum_y, sum_xx, sum_xy, sum_yy):
+    sxx = sum_xx - sum_x * sum_x / n
+    sxy = sum_xy - sum_x * sum_y / n
+    slope = sxy / sxx if sxx > 0 else 0.0
+    intercept = (sum_y - slope * sum_x) / n
+    return Regression(n, sum_x, sum_y, sum_xx, sum_xy, sum_yy, slope, intercept)
+
+
+def extreme(dates, rates, index):
+    return Extreme(int(index), float(rates[index]), pd.Timestamp(dates[index]))
+
+
+#Builds the result tuple from already-computed pieces (also used by incremental.SeriesState)
+def build(dates, rates, days, years, rolling_mean, volatility, periods, highest, lowest, regression):
+    first_year = periods[0]
+    return Analytics(
+        dates=_read_only(dates),
+        rates=_read_only(rates),
+        days=_read_only(days),
+        years=_read_only(years),
+        rolling_mean=_read_only(rolling_mean),
+        volatility=_read_only(volatility),
+        annual_avg=annual_frame(first_year, periods[1], periods[2]),
+        monthly_avg=monthly_frame(first_year, periods[3], periods[4]),
+        highest=highest,
+        lowest=lowest,
+        regression=regression,
+    )
+
+
+#One pass over a cleaned, date-sorted series
+def compute_analytics(dates, rates, window=ROLLING_WINDOW):
+    dates = np.asarray(dates).astype("datetime64[ns]", copy=False)
+    rates = np.asarray(rates, dtype=np.float64)
+    if len(rates) == 0:
+        raise ValueError("No observations to analyse")
+    mean, std = rolling_moments(rates, window)
+    periods = period_sums(dates, rates)
+    highest = extreme(dates, rates, rates.argmax())
+    lowest = extreme(dates, rates, rates.argmin())
+    days = day_offsets(dates)
+    regression = fit_line(*regression_sums(days, rates))
+    return build(dates, rates, days, calendar_years(dates), mean, std, periods, highest, lowest, regression)
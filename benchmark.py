@@ -0,0 +1,199 @@
+#Benchmark harness for the ingest, compute and render stages
+#Generates synthetic breakeven-style series shaped like FRED exports (observation_date,<ID> header, gaps,
+#duplicate dates, "." for missing values) at any size, then times each stage separately and records its
+#peak traced memory. Results are written as JSON so runs can be compared over time.
+#
+#  python benchmark.py [--rows 10000 100000 1000000] [--out benchmark.json] [--repeat 3]
+#                      [--no-render] [--no-memory] [--keep-data DIR]
+#
+#Every series spans 2003-2025 like T10YIE, so above ~8,000 rows the observations become intraday.
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+import analytics
+import data_cache
+import distributions
+import pyramid
+import rolling
+import economic_trends_viz as viz
+import streaming
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+SERIES_ID = "BENCH"
+START, END = "2003-01-02", "2025-10-24"
+
+
+#Synthetic FRED-style series: a slow cycle plus a random walk around 2%, rounded to 2 decimals
+#gap_rate of the time slots are skipped, duplicate_rate of the rows repeat a date (half with a revised value)
+#and missing_rate of the values are "." - returns the raw DataFrame as it would be written
+def synthetic_series(rows, seed=0, gap_rate=0.03, duplicate_rate=0.005, missing_rate=0.03):
+    rng = np.random.default_rng(seed)
+    n_dup = int(rows * duplicate_rate)
+    n_obs = rows - n_dup
+
+    start, end = np.datetime64(START, "s"), np.datetime64(END, "s")
+    slots = int(n_obs / (1 - gap_rate)) + 1
+    step = max(int((end - start).astype(np.int64) // slots), 1)
+    daily = step >= 86400
+    if daily:
+        step -= step % 86400
+    kept = np.flatnonzero(rng.random(slots) >= gap_rate)
+    while len(kept) < n_obs:
+        kept = np.union1d(kept, rng.integers(0, slots, n_obs - len(kept)))
+    times = start + np.sort(kept[:n_obs]).astype(np.int64) * np.timedelta64(step, "s")
+
+    t = np.linspace(0.0, 1.0, n_obs)
+    walk = np.cumsum(rng.standard_normal(n_obs)) / np.sqrt(n_obs)
+    rates = 2.0 + 0.4 * np.sin(2 * np.pi * 3 * t) + 0.5 * walk + 0.02 * rng.standard_normal(n_obs)
+    rates = np.round(np.clip(rates, 0.0, 4.0), 2)
+
+    dup = rng.integers(0, n_obs, n_dup)
+    revised = rng.random(n_dup) < 0.5
+    times = np.concatenate((times, times[dup]))
+    rates = np.concatenate((rates, rates[dup] + np.where(revised, 0.01, 0.0)))
+    order = np.argsort(times, kind="stable")
+    times, rates = times[order], rates[order]
+
+    unit = "D" if daily else "s"
+    values = np.char.mod("%.2f", rates).astype(object)
+    values[rng.random(rows) < missing_rate] = "."
+    return pd.DataFrame({"observation_date": np.datetime_as_string(times, unit=unit), SERIES_ID: values})
+
+
+def write_synthetic_csv(path, rows, seed=0):
+    synthetic_series(rows, seed).to_csv(path, index=False)
+    return path
+
+
+#Runs fn once for time (wall and CPU) and, when memory is on, once more under tracemalloc for its peak
+def measure(fn, repeat=1, memory=True):
+    walls, cpus = [], []
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = fn()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, {"wall_s": min(walls), "cpu_s": min(cpus), "peak_bytes": peak}
+
+
+def bench_rows(rows, workdir, seed=0, repeat=1, memory=True, render=True):
+    path = os.path.join(workdir, f"{SERIES_ID}_{rows}.csv")
+    generated, gen = measure(lambda: write_synthetic_csv(path, rows, seed), memory=False)
+    stages = []
+
+    def stage(name, fn):
+        result, stats = measure(fn, repeat, memory)
+        stages.append(dict(stage=name, **stats))
+        return result
+
+    cache_dir = os.path.join(workdir, f"cache_{rows}")
+
+    def cold_cache():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        return data_cache.load_clean_series(path, cache_dir)
+
+    #Ingest: parse + clean as load_data did, the on-disk cache cold and warm, and the chunked streaming path
+    df = stage("ingest.parse_clean", lambda: data_cache.read_clean_csv(path))
+    stage("ingest.cache_cold", cold_cache)
+    stage("ingest.cache_warm", lambda: data_cache.load_clean_series(path, cache_dir))
+    stage("ingest.stream", lambda: streaming.stream_aggregates(path))
+
+    #Derived data: the shared analytics pass, the distribution summaries, the aggregate pyramid and the rolling windows
+    stats = stage("derive.analytics", lambda: analytics.compute_analytics(df["Date"], df["Rate"]))
+    stage("derive.distributions", lambda: distributions.summarize(stats.years, stats.rates))
+    stage("derive.pyramid", lambda: pyramid.build(stats.dates, stats.rates))
+    stage("derive.rolling", lambda: rolling.compute(stats.dates, stats.rates))
+    data = viz.series_data(SERIES_ID, df, stats)
+
+    #Each visualization: building the figure, then rasterising it to PNG
+    if render:
+        for slug, _, plot in viz.VISUALIZATIONS:
+            figures = []
+
+            def build():
+                fig = plot(data)
+                figures.append(fig)
+                return fig
+
+            fig = stage(f"viz.{slug}.compute", build)
+            stage(f"viz.{slug}.render", lambda: fig.savefig(io.BytesIO(), format="png", dpi=100))
+            for f in figures:
+                viz.plt.close(f)
+
+    return {
+        "rows": rows,
+        "clean_rows": int(len(df)),
+        "csv_bytes": os.path.getsize(generated),
+        "generate_s": gen["wall_s"],
+        "stages": stages,
+    }
+
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingest, analytics and all 11 visualizations on synthetic series.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="series sizes (default: 10k 100k 1M)")
+    parser.add_argument("--out", default="benchmark.json", help="JSON results file (default: benchmark.json)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the generator")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per stage; the fastest is kept")
+    parser.add_argument("--no-render", action="store_true", help="skip the 11 visualizations")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--keep-data", metavar="DIR", help="write the generated CSVs here and keep them")
+    args = parser.parse_args(argv)
+
+    workdir = args.keep_data or tempfile.mkdtemp(prefix="t10yie_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    runs = []
+    try:
+        for rows in args.rows:
+            run = bench_rows(rows, workdir, args.seed, args.repeat, not args.no_memory, not args.no_render)
+            runs.append(run)
+            total = sum(s["wall_s"] for s in run["stages"])
+            print(f"{rows:>10,} rows: {total:8.3f}s over {len(run['stages'])} stages")
+            for s in run["stages"]:
+                peak = "" if s["peak_bytes"] is None else f"  peak {s['peak_bytes'] / 2**20:9.1f} MiB"
+                print(f"    {s['stage']:<28} {s['wall_s']:8.3f}s{peak}")
+    finally:
+        if not args.keep_data:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.out, "w") as f:
+        json.dump({"environment": environment(), "seed": args.seed, "repeat": args.repeat, "runs": runs}, f, indent=1)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
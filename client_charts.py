@@ -0,0 +1,147 @@
+#Browser-side rendering for the time-series, bar and heatmap views
+#Instead of a matplotlib PNG, these views can send a small typed table (float32 values, millisecond
+#timestamps, int16 years - Streamlit ships it to the browser as Arrow) plus a Vega-Lite spec. Hover, zoom
+#and pan then run in the browser without a rerun or a new rasterisation on the server.
+#Payloads are bounded: long series are sent as pyramid levels or decimated to POINTS rows, so the payload
+#size does not grow with the history.
+
+import numpy as np
+import pandas as pd
+
+import downsample
+import pyramid
+
+#Rows sent for a time series (about two per pixel of a wide browser chart)
+POINTS = 2000
+HEIGHT = 420
+#Heatmaps with more cells than this are drawn without value labels
+ANNOTATE_CELLS = 400
+
+#Drag to pan, scroll to zoom - on the time axis only
+_ZOOM = [{"name": "zoom", "select": {"type": "interval", "encodings": ["x"]}, "bind": "scales"}]
+
+
+def _dates(values):
+    return np.asarray(values).astype("datetime64[ms]")
+
+
+def _values(values):
+    return np.asarray(values, dtype=np.float32)
+
+
+#Date/Rate rows for the rate line between start and end: the raw rows when there is one per day and they
+#fit, otherwise the coarsest pyramid level that fills POINTS (with each bucket's Low/High)
+def rate_payload(stats, pyr, start, end, points=POINTS):
+    level, lo, hi = pyramid.choose_level(pyr, start, end, points)
+    if level.name == "daily" and hi - lo == len(stats.rates):
+        idx = downsample.decimate(stats.dates, stats.rates, points, "minmax") if hi - lo > points else slice(None)
+        return pd.DataFrame({"Date": _dates(stats.dates[idx]), "Rate": _values(stats.rates[idx])})
+    idx = np.arange(lo, hi)
+    if len(idx) > points:
+        idx = idx[downsample.decimate(level.starts[lo:hi], pyramid.means(level, lo, hi), points, "minmax")]
+    return pd.DataFrame({
+        "Date": _dates(level.starts[idx]),
+        "Rate": _values(level.sum[idx] / level.count[idx]),
+        "Low": _values(level.min[idx]),
+        "High": _values(level.max[idx]),
+    })
+
+
+#Date plus the given {column: per-row values}, thinned together on the first column's min/max
+def series_payload(dates, columns, points=POINTS):
+    first = next(iter(columns.values()))
+    idx = downsample.decimate(dates, first, points, "minmax") if len(first) > points else slice(None)
+    frame = {"Date": _dates(np.asarray(dates)[idx])}
+    frame.update({name: _values(np.asarray(values)[idx]) for name, values in columns.items()})
+    return pd.DataFrame(frame)
+
+
+def annual_payload(annual_avg):
+    return pd.DataFrame({"Year": annual_avg["Year"].to_numpy(np.int16), "Rate": _values(annual_avg["Rate"])})
+
+
+#Long rows of a heatmaps.Grid (row label, column label, Rate; empty cells left out)
+def grid_payload(grid):
+    values = np.asarray(grid.values)
+    r, c = np.nonzero(~np.isnan(values))
+    return pd.DataFrame({
+        grid.row_title: np.asarray(grid.row_labels, dtype=object)[r],
+        grid.col_title: np.asarray(grid.col_labels, dtype=object)[c],
+        "Rate": _values(values[r, c]),
+    })
+
+
+def _time_x(title="Year"):
+    return {"field": "Date", "type": "temporal", "title": title}
+
+
+#Line of `field` over time, with the Low/High band when the payload has one
+def line_spec(payload, title, y_title, color="navy", field="Rate"):
+    layers = []
+    if "Low" in payload.columns:
+        layers.append({
+            "mark": {"type": "area", "color": color, "opacity": 0.15},
+            "encoding": {"x": _time_x(), "y": {"field": "Low", "type": "quantitative"}, "y2": {"field": "High"}},
+        })
+    layers.append({
+        "mark": {"type": "line", "color": color, "strokeWidth": 1},
+        "params": _ZOOM,
+        "encoding": {
+            "x": _time_x(),
+            "y": {"field": field, "type": "quantitative", "title": y_title, "scale": {"zero": False}},
+            "tooltip": [{"field": "Date", "type": "temporal"}, {"field": field, "type": "quantitative", "format": ".2f"}],
+        },
+    })
+    return {"title": title, "height": HEIGHT, "layer": layers}
+
+
+#Several columns of a series payload as coloured lines (folded in the browser, so the payload stays wide)
+def multi_line_spec(payload, title, y_title, colors):
+    names = [c for c in payload.columns if c != "Date"]
+    return {
+        "title": title,
+        "height": HEIGHT,
+        "transform": [{"fold": names, "as": ["Series", "Value"]}],
+        "mark": {"type": "line", "strokeWidth": 1.5},
+        "params": _ZOOM,
+        "encoding": {
+            "x": _time_x(),
+            "y": {"field": "Value", "type": "quantitative", "title": y_title, "scale": {"zero": False}},
+            "color": {"field": "Series", "type": "nominal", "sort": names,
+                      "scale": {"domain": names, "range": colors}, "legend": {"orient": "top-left"}},
+            "tooltip": [{"field": "Date", "type": "temporal"}, {"field": "Series"},
+                        {"field": "Value", "type": "quantitative", "format": ".2f"}],
+        },
+    }
+
+
+def bar_spec(title):
+    return {
+        "title": title,
+        "height": HEIGHT,
+        "mark": {"type": "bar"},
+        "encoding": {
+            "x": {"field": "Year", "type": "ordinal"},
+            "y": {"field": "Rate", "type": "quantitative", "title": "Average Rate (%)"},
+            "color": {"field": "Year", "type": "ordinal", "scale": {"scheme": "tealblues"}, "legend": None},
+            "tooltip": [{"field": "Year"}, {"field": "Rate", "type": "quantitative", "format": ".2f"}],
+        },
+    }
+
+
+#Cells are labelled only when there are few enough to read
+def heatmap_spec(title, grid, max_labels=ANNOTATE_CELLS):
+    encoding = {
+        "x": {"field": grid.col_title, "type": "ordinal", "sort": list(grid.col_labels)},
+        "y": {"field": grid.row_title, "type": "ordinal", "sort": list(grid.row_labels)},
+    }
+    layers = [{"mark": "rect", "encoding": {
+        "color": {"field": "Rate", "type": "quantitative", "scale": {"scheme": "yellowgreenblue"}},
+        "tooltip": [{"field": grid.row_title}, {"field": grid.col_title},
+                    {"field": "Rate", "type": "quantitative", "format": ".2f"}],
+    }}]
+    if np.size(grid.values) <= max_labels:
+        layers.append({"mark": {"type": "text", "fontSize": 9}, "encoding": {
+            "text": {"field": "Rate", "type": "quantitative", "format": ".2f"},
+        }})
+    return {"title": title, "height": HEIGHT, "encoding": encoding, "layer": layers}
@@ -0,0 +1,231 @@
+#On-disk cache of the cleaned Date/Rate series
+#Parsing the CSV text is most of the startup cost, so the cleaned columns are kept next to the source file
+#as raw little-endian arrays that can be memory-mapped straight back in (no text parsing on a warm start).
+#The cache is keyed by the source file's size, modification time and SHA-256 content hash.
+#When rows are only appended to the CSV, just the new tail is parsed and added to the cache files.
+
+import hashlib
+import io
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIRNAME = ".t10yie_cache"
+CACHE_FORMAT = 2
+HASH_CHUNK = 1 << 20
+#Bytes hashed at the start and just before the stored offset to recognise an append
+PROBE_BYTES = 4096
+
+#version changes whenever the data changes; lineage only changes on a full rebuild,
+#so rows [0, old row count) are unchanged while the lineage stays the same
+CachedSeries = namedtuple("CachedSeries", ["dates", "rates", "version", "lineage"])
+
+
+#Data Cleaning - the same steps both apps used to run inline
+def clean_frame(df):
+    #Renaming the columns
+    df.columns = ["Date", "Rate"]
+    #Converting the date column to datatime format
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    #Missing Values
+    df["Rate"] = pd.to_numeric(df["Rate"], errors="coerce")
+    #Removing Duplicates
+    df.drop_duplicates(inplace=True)
+    df.dropna(inplace=True)
+    #Sorting the data by date
+    df.sort_values(by="Date", inplace=True)
+    #Sequential Indexing
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+
+def read_clean_csv(path):
+    return clean_frame(pd.read_csv(path))
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_paths(path, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRNAME)
+    stem = os.path.join(cache_dir, os.path.basename(path))
+    return {
+        "dir": cache_dir,
+        "meta": stem + ".meta.json",
+        "dates": stem + ".dates.i8",
+        "rates": stem + ".rates.f8",
+    }
+
+
+def _read_meta(paths):
+    try:
+        with open(paths["meta"]) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != CACHE_FORMAT:
+        return None
+    return meta
+
+
+#Writes a whole file through a temporary next to it renamed over the target, so readers never see a partial file
+def write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_meta(paths, meta):
+    write_atomic(paths["meta"], json.dumps(meta, indent=1).encode("utf-8"))
+
+
+def _map_arrays(paths, rows):
+    #Zero-copy: the arrays are read-only views onto the cache files
+    if rows == 0:
+        return np.empty(0, dtype="datetime64[ns]"), np.empty(0, dtype=np.float64)
+    dates = np.memmap(paths["dates"], dtype="<i8", mode="r", shape=(rows,)).view("datetime64[ns]")
+    rates = np.memmap(paths["rates"], dtype="<f8", mode="r", shape=(rows,))
+    return dates, rates
+
+
+def _frame_arrays(df):
+    dates = df["Date"].to_numpy(dtype="datetime64[ns]").view("<i8")
+    rates = df["Rate"].to_numpy(dtype="<f8")
+    return dates, rates
+
+
+def _probe_hashes(path, offset):
+    with open(path, "rb") as f:
+        head = f.read(min(PROBE_BYTES, offset))
+        start = max(0, offset - PROBE_BYTES)
+        f.seek(start)
+        tail = f.read(offset - start)
+    return (hashlib.sha256(head).hexdigest(), hashlib.sha256(tail).hexdigest(), tail.endswith(b"\n"))
+
+
+def _store(paths, path, df, stat, digest):
+    os.makedirs(paths["dir"], exist_ok=True)
+    dates, rates = _frame_arrays(df)
+    write_atomic(paths["dates"], dates.tobytes())
+    write_atomic(paths["rates"], rates.tobytes())
+    head, tail, newline = _probe_hashes(path, stat.st_size)
+    meta = {
+        "format": CACHE_FORMAT,
+        "source": os.path.basename(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest,
+        "version": digest,
+        "lineage": digest,
+        "rows": int(len(df)),
+        "last_date": int(dates[-1]) if len(dates) else None,
+        "head_sha256": head,
+        "tail_sha256": tail,
+        "ends_newline": newline,
+    }
+    _write_meta(paths, meta)
+    return meta
+
+
+def _append_column(file_path, rows, values):
+    #Overwrite from the last committed row so a half-finished earlier append is discarded
+    with open(file_path, "r+b") as f:
+        f.seek(rows * values.itemsize)
+        f.write(values.tobytes())
+        f.truncate()
+
+
+#Parses only the bytes written after the stored offset; returns the new meta or None when
+#the file was rewritten (or the new rows are not strictly later), in which case the caller rebuilds
+def _try_append(paths, path, meta, stat):
+    offset = meta["size"]
+    if stat.st_size <= offset or not meta.get("ends_newline"):
+        return None
+    head, tail, _ = _probe_hashes(path, offset)
+    if head != meta["head_sha256"] or tail != meta["tail_sha256"]:
+        return None
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        new_bytes = f.read(stat.st_size - offset)
+    new = clean_frame(pd.read_csv(io.BytesIO(new_bytes), header=None))
+    dates, rates = _frame_arrays(new)
+    if len(dates) and meta["last_date"] is not None and dates[0] <= meta["last_date"]:
+        return None
+
+    if len(dates):
+        _append_column(paths["dates"], meta["rows"], dates)
+        _append_column(paths["rates"], meta["rows"], rates)
+        meta["last_date"] = int(dates[-1])
+    head, tail, newline = _probe_hashes(path, stat.st_size)
+    meta.update({
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        #The full-file hash is not recomputed for an append; chain the version instead
+        "sha256": None,
+        "version": hashlib.sha256((meta["version"]).encode("ascii") + new_bytes).hexdigest(),
+        "rows": meta["rows"] + int(len(dates)),
+        "head_sha256": head,
+        "tail_sha256": tail,
+        "ends_newline": newline,
+    })
+    _write_meta(paths, meta)
+    return meta
+
+
+def _is_fresh(paths, meta, stat, path):
+    if meta is None or meta["size"] != stat.st_size:
+        return False
+    if meta["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    #Touched but maybe not changed - fall back to comparing the content hash
+    if meta["sha256"] is None or content_hash(path) != meta["sha256"]:
+        return False
+    meta["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _write_meta(paths, meta)
+    except OSError:
+        pass
+    return True
+
+
+#Loads the cleaned series, parsing the CSV only when the cache is missing or stale
+#(and only the appended tail when the file just grew)
+def load_clean_series(path, cache_dir=None):
+    stat = os.stat(path)
+    paths = cache_paths(path, cache_dir)
+    meta = _read_meta(paths)
+    try:
+        if not _is_fresh(paths, meta, stat, path) and meta is not None:
+            meta = _try_append(paths, path, meta, stat)
+        if meta is not None:
+            dates, rates = _map_arrays(paths, meta["rows"])
+            return CachedSeries(dates, rates, meta["version"], meta["lineage"])
+    except (OSError, ValueError, pd.errors.ParserError):
+        pass
+
+    digest = content_hash(path)
+    df = read_clean_csv(path)
+    try:
+        meta = _store(paths, path, df, stat, digest)
+        dates, rates = _map_arrays(paths, meta["rows"])
+    except OSError:
+        #Read-only checkout: still works, just without the cache
+        dates, rates = _frame_arrays(df)
+        dates = dates.view("datetime64[ns]")
+    return CachedSeries(dates, rates, digest, digest)
+
+
+def load_clean_frame(path, cache_dir=None):
+    series = load_clean_series(path, cache_dir)
+    return pd.DataFrame({"Date": series.dates, "Rate": series.rates}, copy=False)
@@ -0,0 +1,149 @@
+#One shared, read-only dataset per series for every Streamlit session
+#A DatasetStore (one per series file, kept in st.cache_resource) brings the incremental state up to date and
+#hands all sessions the same Dataset for a data version: the compact analytics snapshot (read-only int32 day
+#offsets, float32 rates and rolling values) plus what the views derive from it - the zoom index and the
+#distribution summaries, the detected regimes and the rolling/expanding regression trends - each built on first
+#use and kept with the dataset. The float32 arrays are only for plotting: the aggregates (pyramid, rolling
+#statistics, regimes, range extremes) are computed from the float64 rates of the data cache.
+#The multi-window rolling statistics and the regression prefix sums come from the incremental state, so an
+#append only computes them for the new rows, and the aggregate pyramid is saved with the data cache, so it is
+#only built once per version.
+#Sessions only hold references to it, so memory does not grow with the number of sessions.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import distributions
+import incremental
+import pyramid
+import regimes
+import rolling
+import trends
+import zoom
+
+#Distribution summaries of zoomed ranges kept per dataset (the full range is always kept)
+SUMMARY_RANGES = 16
+#Rolling-trend window sizes kept per dataset
+TREND_WINDOWS = 4
+
+
+class Dataset:
+    #rolling_stats: {spec: RollingStats} of every rolling.WINDOWS window when already kept (incremental.SeriesState)
+    def __init__(self, version, stats, prefix=None, pyramid_path=None, rates=None, rolling_stats=None):
+        self.version = version
+        self.stats = stats
+        #Full-precision rates behind the aggregates (the snapshot's float32 ones when not given)
+        self.rates = np.asarray(stats.rates if rates is None else rates, dtype=np.float64)
+        self.rows = len(stats.rates)
+        self._lock = threading.Lock()
+        self._prefix = prefix
+        self._pyramid_path = pyramid_path
+        self._pyramid = None
+        self._rolling_stats = rolling_stats
+        self._regimes = {}
+        self._index = None
+        self._expanding = None
+        self._rolling_trends = OrderedDict()
+        self._full_summary = None
+        self._summaries = OrderedDict()
+
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                self._index = zoom.build_index(self.stats, self._prefix, self.rates)
+            return self._index
+
+    #Daily to yearly aggregates (pyramid.Pyramid), loaded from disk when saved for this version
+    def pyramid(self):
+        with self._lock:
+            if self._pyramid is None:
+                self._pyramid = pyramid.load_or_build(self._pyramid_path, self.version, self.stats.dates, self.rates)
+            return self._pyramid
+
+    #Rolling mean/std/min/max/z-score of every rolling.WINDOWS window ({spec: RollingStats}) - kept up to date by
+    #the store's incremental state, or all computed together on first use - so switching windows is only a lookup
+    def rolling(self):
+        with self._lock:
+            if self._rolling_stats is None:
+                self._rolling_stats = rolling.compute(self.stats.dates, self.rates)
+            return self._rolling_stats
+
+    #Change points and anomaly flags (regimes.Regimes) for one parameter set, detected once per version and set
+    def regimes(self, max_breaks=regimes.MAX_BREAKS, min_size=regimes.MIN_SIZE,
+                z_window=regimes.Z_WINDOW, z_threshold=regimes.Z_THRESHOLD):
+        zscores = self.rolling()[z_window].zscore
+        key = (max_breaks, min_size, z_window, z_threshold)
+        with self._lock:
+            if key not in self._regimes:
+                self._regimes[key] = regimes.detect(self.rates, zscores, max_breaks, min_size, z_threshold)
+            return self._regimes[key]
+
+    #Regression prefix sums (those of the zoom index when the dataset was built without them)
+    def prefix(self):
+        if self._prefix is None:
+            index = self.index()
+            self._prefix = trends.Prefix(index.sum_x, index.sum_y, index.sum_xx, index.sum_xy, index.sum_yy)
+        return self._prefix
+
+    #Regression of every `window`-row window over the whole series (full-history context, like the rolling mean)
+    def rolling_trend(self, window):
+        prefix = self.prefix()
+        with self._lock:
+            if window in self._rolling_trends:
+                self._rolling_trends.move_to_end(window)
+                return self._rolling_trends[window]
+            trend = trends.rolling(prefix, self.stats.days, window)
+            self._rolling_trends[window] = trend
+            while len(self._rolling_trends) > TREND_WINDOWS:
+                self._rolling_trends.popitem(last=False)
+            return trend
+
+    #Regression of the rows up to each row
+    def expanding_trend(self):
+        prefix = self.prefix()
+        with self._lock:
+            if self._expanding is None:
+                self._expanding = trends.expanding(prefix, self.stats.days)
+            return self._expanding
+
+    #Analytics of rows [lo, hi) (slices plus aggregates from the zoom index)
+    def window(self, lo, hi):
+        return zoom.window(self.stats, self.index(), lo, hi)
+
+    #Distribution summary of rows [lo, hi)
+    def summary(self, lo=0, hi=None):
+        hi = self.rows if hi is None else hi
+        full = lo == 0 and hi == self.rows
+        with self._lock:
+            if full and self._full_summary is not None:
+                return self._full_summary
+            if not full and (lo, hi) in self._summaries:
+                self._summaries.move_to_end((lo, hi))
+                return self._summaries[(lo, hi)]
+            summary = distributions.summarize(self.stats.years[lo:hi], self.stats.rates[lo:hi])
+            if full:
+                self._full_summary = summary
+            else:
+                self._summaries[(lo, hi)] = summary
+                while len(self._summaries) > SUMMARY_RANGES:
+                    self._summaries.popitem(last=False)
+            return summary
+
+
+class DatasetStore:
+    def __init__(self, window=incremental.ROLLING_WINDOW, pyramid_path=None):
+        self.state = incremental.SeriesState(window)
+        self.pyramid_path = pyramid_path
+        self.lock = threading.Lock()
+        self.current = None
+
+    #Dataset for a data_cache.CachedSeries; a new one only when the data version changed
+    def get(self, series):
+        with self.lock:
+            version, stats = self.state.refresh(series)
+            if self.current is None or self.current.version != version:
+                self.current = Dataset(version, stats, self.state.prefix(), self.pyramid_path, series.rates,
+                                       self.state.rolling())
+            return self.current
@@ -0,0 +1,190 @@
+#Precomputed distribution summaries for the box, violin and histogram views
+#seaborn's boxplot/violinplot/histplot(kde=True) re-derive quartiles and Gaussian KDEs from every raw row on
+#each render. Here they are computed once per data version: per-year quartiles and 1.5 IQR whiskers from one
+#sort, and the KDEs by binning the rates onto a fixed grid and smoothing all years at once with an FFT.
+#Drawing from a DistributionSummary then costs O(years x grid) no matter how many rows there are.
+
+from collections import namedtuple
+
+import numpy as np
+
+GRID_POINTS = 512
+HIST_BINS = 30
+#Violins extend 2 bandwidths past each year's min/max, like seaborn's cut=2
+VIOLIN_CUT = 2
+WHISKER_IQR = 1.5
+
+DistributionSummary = namedtuple("DistributionSummary", [
+    "years", "counts", "mean", "q1", "median", "q3", "whislo", "whishi", "low", "high",
+    "grid", "bandwidth", "density",
+    "hist_counts", "hist_edges", "kde",
+])
+
+
+#Scott's rule, as used by scipy's gaussian_kde (and so by seaborn)
+def scott_bandwidth(std, n):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bw = np.nan_to_num(std) * np.power(np.maximum(n, 1), -0.2)
+    return bw
+
+
+#Linear binning of each group's values onto the grid: (groups x grid) weights
+def _bin(groups, values, n_groups, start, step, size):
+    t = (values - start) / step
+    i = np.clip(np.floor(t).astype(np.int64), 0, size - 2)
+    w = t - i
+    key = groups * size + i
+    binned = np.bincount(key, weights=1.0 - w, minlength=n_groups * size)
+    binned += np.bincount(key + 1, weights=w, minlength=n_groups * size)
+    return binned.reshape(n_groups, size)
+
+
+#Gaussian smoothing of every row of `binned` in one FFT; `sigma` is each row's bandwidth in grid steps
+#The rows are zero-padded to twice their length so the circular convolution does not wrap around
+def fft_smooth(binned, sigma):
+    size = binned.shape[1]
+    n_fft = 1 << int(np.ceil(np.log2(2 * size)))
+    freq = np.fft.rfftfreq(n_fft)
+    kernel = np.exp(-2.0 * (np.pi * freq[None, :] * np.asarray(sigma, dtype=np.float64)[:, None]) ** 2)
+    smoothed = np.fft.irfft(np.fft.rfft(binned, n=n_fft, axis=1) * kernel, n=n_fft, axis=1)[:, :size]
+    return np.maximum(smoothed, 0.0)
+
+
+#Per-group quantile with linear interpolation (numpy's default), from values sorted within each group
+def _quantile(sorted_values, starts, counts, q):
+    pos = q * (counts - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, counts - 1)
+    frac = pos - lo
+    return sorted_values[starts + lo] * (1 - frac) + sorted_values[starts + hi] * frac
+
+
+def summarize(years, rates, grid_points=GRID_POINTS, bins=HIST_BINS):
+    years = np.asarray(years)
+    rates = np.asarray(rates, dtype=np.float64)
+    if len(rates) == 0:
+        raise ValueError("No observations to summarize")
+    labels, group = np.unique(years, return_inverse=True)
+    k = len(labels)
+
+    #One sort by (year, rate) gives every year's order statistics
+    order = np.lexsort((rates, group))
+    values = rates[order]
+    sorted_group = group[order]
+    counts = np.bincount(group, minlength=k)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sums = np.bincount(group, weights=rates, minlength=k)
+    sq = np.bincount(group, weights=rates * rates, minlength=k)
+    mean = sums / counts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(np.maximum(sq - sums * mean, 0.0) / (counts - 1))
+
+    q1, median, q3 = (_quantile(values, starts, counts, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    #Whiskers reach the most extreme rates still within 1.5 IQR of the box
+    below = np.bincount(sorted_group, weights=values < (q1 - WHISKER_IQR * iqr)[sorted_group], minlength=k)
+    within = np.bincount(sorted_group, weights=values <= (q3 + WHISKER_IQR * iqr)[sorted_group], minlength=k)
+    whislo = values[starts + below.astype(np.int64)]
+    whishi = values[starts + within.astype(np.int64) - 1]
+    low, high = values[starts], values[starts + counts - 1]
+
+    #Shared grid wide enough for every year's kernel tails; all years (plus the overall series) binned together
+    all_std = rates.std(ddof=1) if len(rates) > 1 else 0.0
+    bandwidth = scott_bandwidth(std, counts)
+    overall_bw = float(scott_bandwidth(np.array([all_std]), np.array([len(rates)]))[0])
+    pad = 3 * max(bandwidth.max(), overall_bw)
+    span = max(high.max() - low.min(), 1e-9)
+    pad = pad if pad > 0 else 0.05 * span
+    grid = np.linspace(low.min() - pad, high.max() + pad, grid_points)
+    step = grid[1] - grid[0]
+    bandwidth = np.where(bandwidth > 0, bandwidth, step)
+    overall_bw = overall_bw if overall_bw > 0 else step
+
+    binned = _bin(np.append(group, np.full(len(rates), k)), np.append(rates, rates), k + 1,
+                  grid[0], step, grid_points)
+    sigma = np.append(bandwidth, overall_bw) / step
+    density = fft_smooth(binned, sigma) / (np.append(counts, len(rates))[:, None] * step)
+
+    #Histogram of every rate, with the overall KDE scaled to counts like histplot(kde=True)
+    hist_counts, hist_edges = np.histogram(rates, bins=bins)
+    inside = (grid >= low.min()) & (grid <= high.max())
+    kde = (grid[inside], density[k, inside] * len(rates) * (hist_edges[1] - hist_edges[0]))
+
+    return DistributionSummary(
+        years=labels, counts=counts, mean=mean, q1=q1, median=median, q3=q3,
+        whislo=whislo, whishi=whishi, low=low, high=high,
+        grid=grid, bandwidth=bandwidth, density=density[:k],
+        hist_counts=hist_counts, hist_edges=hist_edges, kde=kde,
+    )
+
+
+#Box statistics in the form Axes.bxp() draws
+def box_stats(summary):
+    return [
+        {"label": str(year), "mean": summary.mean[j], "med": summary.median[j], "q1": summary.q1[j],
+         "q3": summary.q3[j], "whislo": summary.whislo[j], "whishi": summary.whishi[j], "fliers": []}
+        for j, year in enumerate(summary.years)
+    ]
+
+
+#Violin statistics in the form Axes.violin() draws, each cut to its year's range +- VIOLIN_CUT bandwidths,
+#plus per-violin widths so every violin has the same area (seaborn's default scaling)
+def violin_stats(summary, width=0.8):
+    stats = []
+    for j in range(len(summary.years)):
+        reach = VIOLIN_CUT * summary.bandwidth[j]
+        keep = (summary.grid >= summary.low[j] - reach) & (summary.grid <= summary.high[j] + reach)
+        stats.append({
+            "coords": summary.grid[keep], "vals": summary.density[j, keep],
+            "mean": summary.mean[j], "median": summary.median[j],
+            "min": summary.low[j], "max": summary.high[j],
+            "quantiles": [summary.q1[j], summary.median[j], summary.q3[j]],
+        })
+    peaks = np.array([s["vals"].max() for s in stats])
+    widths = width * peaks / peaks.max()
+    return stats, widths
+
+
+#n colors spread over a matplotlib colormap the way seaborn samples one (both ends skipped)
+def palette(cmap, n):
+    return cmap(np.linspace(0, 1, n + 2)[1:-1])
+
+
+#Box plot from the summary (no fliers, like showfliers=False), one color per year
+def draw_boxes(ax, summary, colors):
+    artists = ax.bxp(box_stats(summary), positions=np.arange(len(summary.years)), widths=0.8,
+                     showfliers=False, patch_artist=True, medianprops={"color": "0.2"})
+    for box, color in zip(artists["boxes"], colors):
+        box.set_facecolor(color)
+        box.set_edgecolor("0.2")
+    return artists
+
+
+#Violins with quartile lines (like inner="quartile"), one color per year
+def draw_violins(ax, summary, colors, linewidth=1.5):
+    stats, widths = violin_stats(summary)
+    artists = ax.violin(stats, positions=np.arange(len(summary.years)), widths=widths,
+                        showextrema=False, showmeans=False, showmedians=False)
+    for body, color in zip(artists["bodies"], colors):
+        body.set_facecolor(color)
+        body.set_edgecolor("0.2")
+        body.set_linewidth(linewidth)
+        body.set_alpha(1)
+    if "cquantiles" in artists:
+        artists["cquantiles"].set_color("0.2")
+        artists["cquantiles"].set_linestyle("--")
+    ax.set_xticks(np.arange(len(summary.years)), [str(y) for y in summary.years])
+    return artists
+
+
+#Histogram bars plus the overall KDE curve (scaled to counts)
+def draw_histogram(ax, summary, color, hist_counts=None, hist_edges=None):
+    counts = summary.hist_counts if hist_counts is None else hist_counts
+    edges = summary.hist_edges if hist_edges is None else hist_edges
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color=color, alpha=0.6, edgecolor="white")
+    x, y = summary.kde
+    if hist_counts is not None:
+        #The curve was scaled to the summary's own bins; rescale it to the bins drawn
+        own = summary.hist_counts.sum() * (summary.hist_edges[1] - summary.hist_edges[0])
+        y = y * counts.sum() * (edges[1] - edges[0]) / own
+    ax.plot(x, y, color=color, linewidth=2)
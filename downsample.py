@@ -0,0 +1,88 @@
+#Pixel-aware downsampling for the long line/scatter views
+#A figure can only show about one point per pixel column, so each series is reduced to roughly
+#2x the figure's pixel width before plotting. LTTB (Largest-Triangle-Three-Buckets) keeps the visual
+#shape of a line; min/max bucketing keeps every bucket's lowest and highest point, so no visible peak is lost.
+#Only what gets drawn is reduced - statistics such as the extremes are still computed on the full data.
+
+import numpy as np
+
+POINTS_PER_PIXEL = 2
+
+
+#Number of points worth drawing for a figure (2x its width in pixels)
+def target_points(fig, factor=POINTS_PER_PIXEL):
+    return int(fig.get_figwidth() * fig.dpi * factor)
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").view(np.int64)
+    x = x.astype(np.float64)
+    #Shift to the first value so large epoch offsets do not swamp the triangle areas
+    return x - x[0] if len(x) else x
+
+
+#Indices of the LTTB selection (always keeps the first and last point)
+def lttb_indices(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    #n_out-2 buckets over the inner points; the averages of each "next" bucket are computed up front
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(np.nan_to_num(y[1:n - 1]), edges[:-1] - 1) / counts
+    avg_x = np.append(avg_x, x[-1])
+    avg_y = np.append(avg_y, y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax_, ay_ = x[a], y[a]
+        area = np.abs((ax_ - avg_x[i + 1]) * (y[lo:hi] - ay_) - (ax_ - x[lo:hi]) * (avg_y[i + 1] - ay_))
+        a = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        out[i + 1] = a
+    return out
+
+
+#Indices of each bucket's minimum and maximum (in time order), plus the first and last point
+def minmax_indices(y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    n_buckets = n_out // 2
+    size = -(-n // n_buckets)
+    padded_low = np.full(n_buckets * size, np.inf)
+    padded_high = np.full(n_buckets * size, -np.inf)
+    padded_low[:n] = np.where(np.isnan(y), np.inf, y)
+    padded_high[:n] = np.where(np.isnan(y), -np.inf, y)
+    starts = np.arange(n_buckets) * size
+    lows = starts + padded_low.reshape(n_buckets, size).argmin(axis=1)
+    highs = starts + padded_high.reshape(n_buckets, size).argmax(axis=1)
+    idx = np.unique(np.concatenate(([0, n - 1], lows, highs)))
+    return idx[idx < n]
+
+
+def decimate(x, y, n_out, method="lttb"):
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    raise ValueError(f"Unknown downsampling method: {method!r}")
+
+
+#Returns the (x, y) pair to plot: reduced to n_out points when enabled and the series is longer than that
+def thin(x, y, n_out, method="lttb", enabled=True):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if not enabled or len(y) <= n_out:
+        return x, y
+    idx = decimate(x, y, n_out, method)
+    return x[idx], y[idx]
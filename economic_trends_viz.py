@@ -3,54 +3,133 @@
 #Some of the graphs include line plots, bar charts, box plots, heatmaps, histograms, violin plots, pie charts, and regression analysis to show trends in multiple ways. 
 # It also highlights major ecnonomic events! 
 
+#How to run:
+#  streamlit run economic_trends_viz.py          -> the interactive page with all 11 visualizations
+#  python economic_trends_viz.py [CSV ...]       -> headless report pack (PNG/PDF) for one or more series
+#                                                   (CSV files, directories of them or manifest files),
+#                                                   e.g. --out-dir reports --dpi 150 --workers 4 --format pdf --multipage
+
 # Imported necessary libraries
-import streamlit as st
+#streamlit, pyplot and seaborn are heavy, so they are only imported once something needs them
 import os
+import sys
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import matplotlib
 import numpy as np
-from datetime import datetime
-
-st.set_page_config(page_title="Economic Trend Visualization")
-st.title("Economic Trend Visualization")
-st.markdown("Explores different trends in inflation, averages, and economic events during previous years")
+import data_cache
+import streaming
+import downsample
+import analytics
+import multi_series
+import distributions
+import events
+import exports
+import heatmaps
+import regimes
+import trends
+import lazy_imports
+
+#Figures only ever go to image files or the Streamlit page, so pin the non-interactive backend up front
+matplotlib.use("Agg")
+plt = lazy_imports.lazy_module("matplotlib.pyplot")
+sns = lazy_imports.lazy_module("seaborn")
+
+#Long series are reduced to ~2 points per pixel before drawing the line/scatter views (the stats still use every row)
+#Default of every plot function's `decimate` argument; the CLI turns it off with --no-downsample
+DOWNSAMPLE = True
 
 # Loaded the dataset
 data_path = os.path.join(os.path.dirname(__file__), 'T10YIE.csv')
-df = pd.read_csv(data_path)
-
-print("Welcome to the Economic Trend Visualizer. This project visualizes the 10-Year Inflation Expectation Rate (T10YIE) using data from the Federal Reserve Bank of St. Louis.")
-print("Explores trends, cleans data, and points out major economic events")
-print("Gain insights into inflation expectations over time through informative visualizations")
+#Folder searched for other FRED series CSVs to choose from on the page
+data_dir = os.environ.get("T10YIE_DATA_DIR", os.path.dirname(os.path.abspath(__file__)))
+#Folder the aggregate exports (Arrow IPC, Parquet, CSV and their manifest) are written to
+EXPORT_DIR = os.environ.get("T10YIE_EXPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports"))
 
+#Everything the visualizations draw from, computed once per series
+SeriesData = namedtuple("SeriesData", [
+    "name", "df", "stats", "annual_avg", "monthly_avg", "highest_rate", "lowest_rate", "aggregates",
+    "distributions", "regimes", "version",
+])
 
-#Inspect the data
-print(df.head())
-#print(df.info())
 
 # Data Cleaning
 #Minimal AI assistance
-#Renaming the columns
-df.columns = ["Date", "Rate"]
-#Converting the date column to datatime format
-df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-#Missing Values
-df["Rate"] = pd.to_numeric(df["Rate"], errors="coerce")
-#Removing Duplicates
-df.drop_duplicates(inplace=True)
-df.dropna(inplace=True)
-#Sorting the data by date
-df.sort_values(by="Date", inplace=True)
-#Sequential Indexing
-df.reset_index(drop=True, inplace=True)
-#print(df.info())
+#The cleaning steps (renaming, datetime/numeric conversion, duplicates, missing values, sorting) live in data_cache.clean_frame
+#and the cleaned result is cached on disk, so only the first run after the CSV changes parses the text
+#Very large files (or T10YIE_STREAMING=1) are streamed in chunks instead: the views then render from
+#the streamed aggregates and a per-day series, so memory stays bounded
+def load_series(path):
+    aggregates = None
+    if streaming.should_stream(path):
+        aggregates = streaming.stream_aggregates(path)
+        df = aggregates.daily.copy()
+        #Streamed files bypass the data cache, so their version is the content hash the cache would use
+        version = data_cache.content_hash(path)
+    else:
+        series = data_cache.load_clean_series(path)
+        df = pd.DataFrame({"Date": series.dates, "Rate": series.rates}, copy=False)
+        version = series.version
+
+    #Derived data for every visualization (90-day rolling mean/std, yearly and monthly averages, extremes,
+    #regression line) computed once in a single pass, instead of adding a column to df for each step
+    stats = analytics.compute_analytics(df["Date"], df["Rate"])
+    return series_data(multi_series.series_name(path), df, stats, aggregates, version)
+
+
+#version: the data_cache version of the series (ties exports to the data they were made from)
+def series_data(name, df, stats, aggregates=None, version=None):
+    annual_avg = stats.annual_avg
+    monthly_avg = stats.monthly_avg
+    highest_rate, lowest_rate = stats.highest, stats.lowest
+    if aggregates is not None:
+        #Streamed aggregates weight every raw observation rather than the per-day means in df
+        annual_avg = aggregates.annual_avg
+        monthly_avg = aggregates.monthly_avg
+        highest_rate = analytics.Extreme(None, *aggregates.highest)
+        lowest_rate = analytics.Extreme(None, *aggregates.lowest)
+    #Per-year quartiles/whiskers and KDE curves for the box, violin and histogram views
+    summary = distributions.summarize(stats.years, stats.rates)
+    #Regime shifts marked in the events view, detected once per series rather than on every render
+    found = regimes.detect(stats.rates)
+    return SeriesData(name, df, stats, annual_avg, monthly_avg, highest_rate, lowest_rate, aggregates, summary,
+                      found, version)
+
+
+#Aggregates of a series written to out_dir by the export layer; returns [exports.ExportResult]
+def export_series(data, out_dir):
+    frames = exports.tables(data.stats, data.annual_avg, data.monthly_avg, data.highest_rate, data.lowest_rate)
+    return exports.export(frames, out_dir, data.name, version=data.version)
+
+
+#Several series at once: the in-memory ones are loaded in parallel into one date-aligned float32 matrix and
+#analysed together (multi_series), the very large ones are still streamed one by one
+#Returns {name: SeriesData} in the order given
+def load_many(paths):
+    streamed = {p for p in paths if streaming.should_stream(p)}
+    loaded = {}
+    in_memory = [p for p in paths if p not in streamed]
+    if in_memory:
+        matrix = multi_series.load_series_matrix(in_memory)
+        versions = dict(zip(matrix.names, matrix.versions))
+        for name, stats in multi_series.matrix_analytics(matrix).items():
+            df = pd.DataFrame({"Date": stats.dates, "Rate": stats.rates}, copy=False)
+            loaded[name] = series_data(name, df, stats, version=versions[name])
+    for path in streamed:
+        data = load_series(path)
+        loaded[data.name] = data
+    return {name: loaded[name] for name in map(multi_series.series_name, paths)}
 
 #Statistical Summary
 #print("Statistical Summary")
 #print(df.describe())
 
 #Data Visualizations
+#Each visualization is a function that takes the SeriesData and returns its figure,
+#so the Streamlit page and the headless report pack draw exactly the same charts
+
 #Visualization - 1
 #Line plot of Inflation Expectation Rate over time
 #plt.figure(figsize=(12,6))
@@ -62,14 +141,16 @@ df.reset_index(drop=True, inplace=True)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("10-Year Inflation Expectation Rate Over Time")
-fig, ax = plt.subplots(figsize=(12,6))
-ax.plot(df["Date"], df["Rate"], color="navy", linewidth=1)
-ax.set_title("10-Year Inflation Expectation Rate Over Time")
-ax.set_xlabel("Year")
-ax.set_ylabel("Inflation Expectation Rate (%)")
-ax.grid(True, linestyle='--', alpha=0.6)
-st.pyplot(fig)
+def plot_line(data, decimate=DOWNSAMPLE):
+    df = data.df
+    fig, ax = plt.subplots(figsize=(12,6))
+    x, y = downsample.thin(df["Date"], df["Rate"], downsample.target_points(fig), enabled=decimate)
+    ax.plot(x, y, color="navy", linewidth=1)
+    ax.set_title("10-Year Inflation Expectation Rate Over Time")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Inflation Expectation Rate (%)")
+    ax.grid(True, linestyle='--', alpha=0.6)
+    return fig
 
 #Visualization - 2
 #Rolling Average (90 days) vs Daily Rate
@@ -86,15 +167,18 @@ st.pyplot(fig)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("10-Year Inflation Expectation: Daily vs 90 Day Average")
-df["Rolling_Mean_90"] = df["Rate"].rolling(window=90, min_periods=1).mean()
-fig, ax = plt.subplots(figsize=(12,6))
-ax.plot(df["Date"], df["Rate"], label="Daily Rate", color="lightgray", alpha=0.5)
-ax.plot(df["Date"], df["Rolling_Mean_90"], label="90-Day Average", color="purple", linewidth=2)
-ax.set_xlabel("Year")
-ax.set_ylabel("Inflation Expectation Rate (%)")
-ax.grid(True, linestyle='--', alpha=0.6)
-st.pyplot(fig)
+def plot_rolling_mean(data, decimate=DOWNSAMPLE):
+    df, stats = data.df, data.stats
+    fig, ax = plt.subplots(figsize=(12,6))
+    n_points = downsample.target_points(fig)
+    x, y = downsample.thin(df["Date"], df["Rate"], n_points, enabled=decimate)
+    ax.plot(x, y, label="Daily Rate", color="lightgray", alpha=0.5)
+    x, y = downsample.thin(df["Date"], stats.rolling_mean, n_points, enabled=decimate)
+    ax.plot(x, y, label="90-Day Average", color="purple", linewidth=2)
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Inflation Expectation Rate (%)")
+    ax.grid(True, linestyle='--', alpha=0.6)
+    return fig
 
 #Visualization - 3
 #Average Bar Plot by Year
@@ -109,16 +193,14 @@ st.pyplot(fig)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("Average Inflation Expectation Rate by Year")
-df["Year"] = df["Date"].dt.year
-annual_avg = df.groupby("Year")["Rate"].mean().reset_index()
-fig, ax = plt.subplots(figsize=(12,6))
-sns.barplot(x="Year", y="Rate", data=annual_avg, palette="cool", ax=ax)
-plt.xticks(rotation=45)
-ax.set_title("Average Inflation Expectation Rate by Year")
-ax.set_xlabel("Year")
-ax.set_ylabel("Average Rate (%)")
-st.pyplot(fig)
+def plot_annual_bar(data, decimate=DOWNSAMPLE):
+    fig, ax = plt.subplots(figsize=(12,6))
+    sns.barplot(x="Year", y="Rate", data=data.annual_avg, palette="cool", ax=ax)
+    plt.xticks(rotation=45)
+    ax.set_title("Average Inflation Expectation Rate by Year")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Average Rate (%)")
+    return fig
 
 
 #Visualization - 4
@@ -133,14 +215,15 @@ st.pyplot(fig)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("Distribution of Inflation Expectation Rate by Year")
-fig, ax = plt.subplots(figsize=(12,6))
-sns.boxplot(x="Year", y="Rate", data=df, palette="cool", showfliers=False, ax=ax)
-ax.set_title("Distribution of Inflation Expectation Rate by Year")
-ax.set_xlabel("Year")
-ax.set_ylabel("Inflation Expectation Rate (%)")
-plt.xticks(rotation=45)
-st.pyplot(fig)
+def plot_boxplot(data, decimate=DOWNSAMPLE):
+    summary = data.distributions
+    fig, ax = plt.subplots(figsize=(12,6))
+    distributions.draw_boxes(ax, summary, distributions.palette(plt.get_cmap("cool"), len(summary.years)))
+    ax.set_title("Distribution of Inflation Expectation Rate by Year")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Inflation Expectation Rate (%)")
+    plt.xticks(rotation=45)
+    return fig
 
 #Visualization - 5
 #Heatmap of Monthly Average Rates
@@ -155,15 +238,11 @@ st.pyplot(fig)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("Heatmap of Monthly Average Inflation Rates")
-df["Month"] = df["Date"].dt.month
-monthly_avg = df.groupby(["Year", "Month"])["Rate"].mean().unstack()
-fig, ax = plt.subplots(figsize=(12,6))
-sns.heatmap(monthly_avg, cmap="YlGnBu", annot=True, fmt=".2f", ax=ax)
-ax.set_title("Heatmap of Monthly Average Inflation Rates")
-ax.set_xlabel("Month")
-ax.set_ylabel("Year")
-st.pyplot(fig)
+def plot_heatmap(data, decimate=DOWNSAMPLE):
+    fig, ax = plt.subplots(figsize=(12,6))
+    heatmaps.draw(ax, heatmaps.year_month(data.monthly_avg))
+    ax.set_title("Heatmap of Monthly Average Inflation Rates")
+    return fig
 
 #Visualization - 6
 #Histogram for Rate Distribution
@@ -175,13 +254,17 @@ st.pyplot(fig)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("Distribution of Inflation Expectation Rates")
-fig, ax = plt.subplots(figsize=(10,6))
-sns.histplot(df["Rate"], bins=30, kde=True, color="teal", ax=ax)
-ax.set_title("Distribution of Inflation Expectation Rates")
-ax.set_xlabel("Inflation Expectation Rate (%)")
-ax.set_ylabel("Frequency")
-st.pyplot(fig)
+def plot_histogram(data, decimate=DOWNSAMPLE):
+    fig, ax = plt.subplots(figsize=(10,6))
+    if data.aggregates is None:
+        distributions.draw_histogram(ax, data.distributions, "teal")
+    else:
+        #Streamed bins cover every raw observation
+        distributions.draw_histogram(ax, data.distributions, "teal", data.aggregates.hist_counts, data.aggregates.hist_edges)
+    ax.set_title("Distribution of Inflation Expectation Rates")
+    ax.set_xlabel("Inflation Expectation Rate (%)")
+    ax.set_ylabel("Frequency")
+    return fig
 
 #Visualization - 7
 #Violin Plot of Inflation Expectation by Year
@@ -195,14 +278,15 @@ st.pyplot(fig)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("Violin Plot of Inflation Expectation by Year")
-fig, ax = plt.subplots(figsize=(12,6))
-sns.violinplot(x="Year", y="Rate", data=df, palette="viridis", inner="quartile", linewidth=1.5, ax=ax)
-plt.xticks(rotation=45)
-ax.set_title("Violin Plot of Inflation Expectation by Year")
-ax.set_xlabel("Year")
-ax.set_ylabel("Inflation Expectation Rate (%)")
-st.pyplot(fig)
+def plot_violin(data, decimate=DOWNSAMPLE):
+    summary = data.distributions
+    fig, ax = plt.subplots(figsize=(12,6))
+    distributions.draw_violins(ax, summary, distributions.palette(plt.get_cmap("viridis"), len(summary.years)))
+    plt.xticks(rotation=45)
+    ax.set_title("Violin Plot of Inflation Expectation by Year")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Inflation Expectation Rate (%)")
+    return fig
 
 #Visualization - 8
 #Pie Chart of Average Inflation by Year
@@ -222,20 +306,21 @@ st.pyplot(fig)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("Proportion of Average Inflation Expectations by Year")
-explode = [0.05]*len(annual_avg)
-fig, ax = plt.subplots(figsize=(8,8))
-ax.pie(
-    annual_avg["Rate"],
-    labels=annual_avg["Year"],
-    autopct="%1.1f%%",
-    startangle=140,
-    colors=plt.cm.plasma(np.linspace(0, 1, len(annual_avg))),
-    explode=explode,
-    wedgeprops={"edgecolor":"black", "linewidth":1.5}
-)
-ax.set_title("Proportion of Average Inflation Expectations by Year")
-st.pyplot(fig)
+def plot_pie(data, decimate=DOWNSAMPLE):
+    annual_avg = data.annual_avg
+    explode = [0.05]*len(annual_avg)
+    fig, ax = plt.subplots(figsize=(8,8))
+    ax.pie(
+        annual_avg["Rate"],
+        labels=annual_avg["Year"],
+        autopct="%1.1f%%",
+        startangle=140,
+        colors=plt.cm.plasma(np.linspace(0, 1, len(annual_avg))),
+        explode=explode,
+        wedgeprops={"edgecolor":"black", "linewidth":1.5}
+    )
+    ax.set_title("Proportion of Average Inflation Expectations by Year")
+    return fig
 
 #Visualization - 9
 #Main Trends Highlight
@@ -250,47 +335,35 @@ st.pyplot(fig)
 #    datetime(2022, 6, 1): "US Inflation Peaks"
 #}
 
-st.subheader("Inflation Trends with Major Economic Events")
-fig, ax = plt.subplots(figsize=(12,6))
-ax.plot(df["Date"], df["Rate"], color="steelblue", label="T10YIE Rate", linewidth=1)
-ax.fill_between(df["Date"], df["Rate"], color="lightblue", alpha=0.5)
-
-events = {
-    datetime(2020, 3, 11): "COVID-19 Pandemic Declared",
-    datetime(2022, 2, 24): "Russia-Ukraine Conflict",
-    datetime(2022, 3, 15): "Fed Rate Hike",
-    datetime(2022, 6, 1): "US Inflation Peaks"
-}
-
-#Minimal AI assistance in the for loop
-for date, label in events.items():
-    color = "red" if "COVID" in label else "orange" if "Conflict" in label else "green" if "Hike" in label else "purple"
-    ax.axvline(date, color=color, label=label, linestyle="--", alpha=0.7)
-
-    rate_on_date = df.loc[df["Date"] == date, "Rate"].values
-    if len(rate_on_date) > 0:
-        y_pos = rate_on_date[0]
-    else:
-        y_pos = df["Rate"].mean()
-
-    ax.text(date, df["Rate"].max()*0.5, label, rotation=90, color=color, fontsize=10, va="center")
-
-#plt.xlim(datetime(2020,1,1), datetime(2022,12,31))
-#plt.title("Inflation Expectation Over Time with Annotated Major Events", fontsize=16)
-#plt.xlabel("Year", fontsize=14)
-#plt.ylabel("Inflation Expectation (%)", fontsize=14)
-#plt.legend().set_title("Major Events")
-#plt.grid(True, linestyle='--', alpha=0.6)
-#plt.tight_layout()
-#plt.show()
-
-
-ax.legend()
-ax.set_title("Inflation Expectation Over Time with Annotated Major Events")
-ax.set_xlabel("Year")
-ax.set_ylabel("Inflation Expectation Rate (%)")
-ax.grid(True, linestyle='--', alpha=0.6)
-st.pyplot(fig)
+def plot_events(data, decimate=DOWNSAMPLE):
+    df, stats = data.df, data.stats
+    fig, ax = plt.subplots(figsize=(12,6))
+    x, y = downsample.thin(df["Date"], df["Rate"], downsample.target_points(fig), method="minmax", enabled=decimate)
+    ax.plot(x, y, color="steelblue", label="T10YIE Rate", linewidth=1)
+    ax.fill_between(x, y, color="lightblue", alpha=0.5)
+
+    #Events come from the catalog (events.csv) plus the regime shifts detected in the series,
+    #joined to their nearest observation in one pass
+    catalog = events.merge(events.load_catalog(), regimes.as_catalog(data.regimes, stats.dates))
+    annotated = events.annotate(catalog, stats.dates, stats.rates)
+    events.draw(ax, annotated, stats.dates[0], stats.dates[-1], stats.highest.rate*0.5)
+
+    #plt.xlim(datetime(2020,1,1), datetime(2022,12,31))
+    #plt.title("Inflation Expectation Over Time with Annotated Major Events", fontsize=16)
+    #plt.xlabel("Year", fontsize=14)
+    #plt.ylabel("Inflation Expectation (%)", fontsize=14)
+    #plt.legend().set_title("Major Events")
+    #plt.grid(True, linestyle='--', alpha=0.6)
+    #plt.tight_layout()
+    #plt.show()
+
+
+    ax.legend()
+    ax.set_title("Inflation Expectation Over Time with Annotated Major Events")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Inflation Expectation Rate (%)")
+    ax.grid(True, linestyle='--', alpha=0.6)
+    return fig
 
 
 #Visualization - 10
@@ -306,16 +379,17 @@ st.pyplot(fig)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("Volatility in Inflation Expectations")
-df["Volatility"] = df["Rate"].rolling(window=90, min_periods=1).std()
-fig, ax = plt.subplots(figsize=(12,6))
-ax.plot(df["Date"], df["Volatility"], color="plum", linewidth=1.5)
-ax.fill_between(df["Date"], df["Volatility"], color="lavender", alpha=0.5)
-ax.set_title("Volatility in Inflation Expectations")
-ax.set_xlabel("Year")
-ax.set_ylabel("Standard Deviation - Volatility (%)")
-ax.grid(True, linestyle='--', alpha=0.6)
-st.pyplot(fig)
+def plot_volatility(data, decimate=DOWNSAMPLE):
+    df, stats = data.df, data.stats
+    fig, ax = plt.subplots(figsize=(12,6))
+    x, y = downsample.thin(df["Date"], stats.volatility, downsample.target_points(fig), method="minmax", enabled=decimate)
+    ax.plot(x, y, color="plum", linewidth=1.5)
+    ax.fill_between(x, y, color="lavender", alpha=0.5)
+    ax.set_title("Volatility in Inflation Expectations")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Standard Deviation - Volatility (%)")
+    ax.grid(True, linestyle='--', alpha=0.6)
+    return fig
 
 #Visualization - 11
 #Forecasting Future Trends w/ Linear Regression
@@ -338,48 +412,192 @@ st.pyplot(fig)
 #plt.tight_layout()
 #plt.show()
 
-st.subheader("Scatter Plot with Linear Regression Trend Line")
-df["Date_Num"] = (df["Date"] - df["Date"].min()).dt.days
-x = df["Date_Num"].values
-y = df["Rate"].values
-#https://data36.com/linear-regression-in-python-numpy-polyfit/ for slope/linear regression basics
-slope, intercept = np.polyfit(x, y, 1)
-y_pred = slope * x + intercept
-fig, ax = plt.subplots(figsize=(12,6))
-ax.scatter(x, y, s=10, label="Rates", color="steelblue", alpha=0.6)
-ax.plot(x, y_pred, color="red", linewidth=2, label=f"Trend Line: y={slope:.5f}x + {intercept:.2f}")
-ax.set_title("Scatter Plot with Linear Regression Trend Line")
-ax.set_xlabel("Days Since 2015-10-26")
-ax.set_ylabel("Inflation Expectation Rate (%)")
-ax.grid(True, linestyle='--', alpha=0.6)
-ax.legend()
-st.pyplot(fig)
-
-
-#Closure
-st.success("All 11 visualizations have been generated successfully.")
-
-#Extremes
-st.subheader("Stats")
-highest_rate = df.loc[df["Rate"].idxmax()]
-lowest_rate = df.loc[df["Rate"].idxmin()]
-st.write(f"\nHighest Inflation Expectation Rate: {highest_rate['Rate']:.2f}% on {highest_rate['Date'].date()}")
-st.write(f"Lowest Inflation Expectation Rcd : {lowest_rate['Rate']:.2f}% on {lowest_rate['Date'].date()}")
-
-#Saving the Results
-output_path = os.path.join(os.path.dirname(__file__), "Yearly_Average_Inflation_Expectation.csv")
-annual_avg.to_csv(output_path, index=False)
-print(f"\nYearly Average Inflation Expectation Rates saved as '{output_path}'")
-
-#Cleanup
-#Minimal AI assistance in the debugging portion here
-for col in ["Date_Num", "Year", "Month", "Rolling_Mean_90"]:
-    if col in df.columns:
-        df.pop(col)
-print("\nTemporary columns removed. Data cleaning complete.")
-
-#Citation
-print("\nSource: Federal Reserve Bank of St. Louis, 10-Year Breakeven Inflation Rate [T10YIE], retrieved from FRED, Federal Reserve Bank of St. Louis; https://fred.stlouisfed.org/series/T10YIE, October 26, 2025.")
+def plot_regression(data, decimate=DOWNSAMPLE):
+    stats = data.stats
+    x = stats.days
+    y = stats.rates
+    #https://data36.com/linear-regression-in-python-numpy-polyfit/ for slope/linear regression basics
+    #Same least-squares line as np.polyfit(x, y, 1), solved from the sums collected in the analytics pass
+    slope, intercept = stats.regression.slope, stats.regression.intercept
+    #R², confidence band and forecast band also come from those sums (trends)
+    trend = trends.from_regression(stats.regression)
+    fig, ax = plt.subplots(figsize=(12,6))
+    #The fit uses every point; only the scatter is thinned, and the line and its bands just need a few points
+    x_plot, y_plot = downsample.thin(x, y, downsample.target_points(fig), method="minmax", enabled=decimate)
+    ax.scatter(x_plot, y_plot, s=10, label="Rates", color="steelblue", alpha=0.6)
+    x_line = np.linspace(x[0], x[-1], 50)
+    y_line, lower, upper = trends.band(trend, x_line)
+    ax.plot(x_line, y_line, color="red", linewidth=2, label=f"Trend Line: y={slope:.5f}x + {intercept:.2f} (R²={trend.r2:.2f})")
+    ax.fill_between(x_line, lower, upper, color="red", alpha=0.2, label=f"{trends.CONFIDENCE:.0%} confidence band")
+    x_ahead, y_ahead, lower, upper = trends.forecast(trend, x[-1])
+    ax.plot(x_ahead, y_ahead, color="red", linestyle="--", linewidth=1.5)
+    ax.fill_between(x_ahead, lower, upper, color="orange", alpha=0.25, label=f"{trends.FORECAST_DAYS}-day forecast band")
+    ax.set_title("Scatter Plot with Linear Regression Trend Line")
+    ax.set_xlabel("Days Since {}".format(pd.Timestamp(stats.dates[0]).date()))
+    ax.set_ylabel("Inflation Expectation Rate (%)")
+    ax.grid(True, linestyle='--', alpha=0.6)
+    ax.legend()
+    return fig
+
+
+#All 11 visualizations in page order: (file name, subheader, function)
+VISUALIZATIONS = [
+    ("01_line", "10-Year Inflation Expectation Rate Over Time", plot_line),
+    ("02_rolling_mean", "10-Year Inflation Expectation: Daily vs 90 Day Average", plot_rolling_mean),
+    ("03_annual_bar", "Average Inflation Expectation Rate by Year", plot_annual_bar),
+    ("04_boxplot", "Distribution of Inflation Expectation Rate by Year", plot_boxplot),
+    ("05_heatmap", "Heatmap of Monthly Average Inflation Rates", plot_heatmap),
+    ("06_histogram", "Distribution of Inflation Expectation Rates", plot_histogram),
+    ("07_violin", "Violin Plot of Inflation Expectation by Year", plot_violin),
+    ("08_pie", "Proportion of Average Inflation Expectations by Year", plot_pie),
+    ("09_events", "Inflation Trends with Major Economic Events", plot_events),
+    ("10_volatility", "Volatility in Inflation Expectations", plot_volatility),
+    ("11_regression", "Scatter Plot with Linear Regression Trend Line", plot_regression),
+]
+
+
+#Streamlit page
+def run_streamlit():
+    import streamlit as st
+    st.set_page_config(page_title="Economic Trend Visualization")
+    st.title("Economic Trend Visualization")
+    st.markdown("Explores different trends in inflation, averages, and economic events during previous years")
+
+    print("Welcome to the Economic Trend Visualizer. This project visualizes the 10-Year Inflation Expectation Rate (T10YIE) using data from the Federal Reserve Bank of St. Louis.")
+    print("Explores trends, cleans data, and points out major economic events")
+    print("Gain insights into inflation expectations over time through informative visualizations")
+
+    #Series picker when the data folder holds more than one FRED series
+    paths = multi_series.discover_series(data_dir) or [data_path]
+    names = [multi_series.series_name(p) for p in paths]
+    path = paths[0]
+    if len(paths) > 1:
+        default = names.index("T10YIE") if "T10YIE" in names else 0
+        path = st.selectbox("Series", paths, index=default, format_func=multi_series.series_name)
+    data = load_series(path)
+
+    #Inspect the data
+    print(data.df.head())
+    #print(df.info())
+
+    for _, title, plot in VISUALIZATIONS:
+        st.subheader(title)
+        fig = plot(data)
+        st.pyplot(fig)
+        plt.close(fig)
+
+    #Closure
+    st.success("All 11 visualizations have been generated successfully.")
+
+    #Extremes
+    st.subheader("Stats")
+    st.write(f"\nHighest Inflation Expectation Rate: {data.highest_rate.rate:.2f}% on {data.highest_rate.date.date()}")
+    st.write(f"Lowest Inflation Expectation Rcd : {data.lowest_rate.rate:.2f}% on {data.lowest_rate.date.date()}")
+
+    #Saving the Results
+    #The yearly CSV is only rewritten when its contents change; all aggregates also go to EXPORT_DIR as
+    #Arrow/Parquet/CSV with a content-hash manifest (unchanged tables are skipped)
+    output_path = os.path.join(os.path.dirname(__file__), "Yearly_Average_Inflation_Expectation.csv")
+    if exports.write_if_changed(output_path, exports.to_bytes(data.annual_avg, "csv")):
+        print(f"\nYearly Average Inflation Expectation Rates saved as '{output_path}'")
+    else:
+        print(f"\nYearly Average Inflation Expectation Rates unchanged in '{output_path}'")
+    for result in export_series(data, EXPORT_DIR):
+        print(f"{result.table}: {result.status}")
+
+    #Cleanup
+    #Derived values live in the analytics result, so df never gets temporary columns to remove
+    print("\nData cleaning complete.")
+
+    #Citation
+    print("\nSource: Federal Reserve Bank of St. Louis, 10-Year Breakeven Inflation Rate [T10YIE], retrieved from FRED, Federal Reserve Bank of St. Louis; https://fred.stlouisfed.org/series/T10YIE, October 26, 2025.")
+
+
+#Headless report pack
+#The series are loaded and analysed once in the parent process and handed to each worker when it starts
+#(inherited for free with fork, pickled once per worker otherwise), so workers only draw and save figures
+_worker_series = {}
+_worker_options = {}
+
+
+def _init_worker(series, options):
+    _worker_series.update(series)
+    _worker_options.update(options)
+
+
+def _save_figure(fig, path, dpi):
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+
+
+#One task is either one figure of one series, or (multipage) every figure of one series in a single PDF
+def _render_task(task):
+    name, index = task
+    data = _worker_series[name]
+    out_dir, dpi, fmt = _worker_options["out_dir"], _worker_options["dpi"], _worker_options["format"]
+    decimate = _worker_options["decimate"]
+    if index is None:
+        from matplotlib.backends.backend_pdf import PdfPages
+        path = os.path.join(out_dir, f"{name}.pdf")
+        with PdfPages(path) as pdf:
+            for _, _, plot in VISUALIZATIONS:
+                fig = plot(data, decimate)
+                pdf.savefig(fig, dpi=dpi, bbox_inches="tight")
+                plt.close(fig)
+        return path
+    slug, _, plot = VISUALIZATIONS[index]
+    path = os.path.join(out_dir, name, f"{slug}.{fmt}")
+    _save_figure(plot(data, decimate), path, dpi)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render all 11 visualizations headlessly for one or more series CSVs.")
+    parser.add_argument("series", nargs="*", default=[data_path],
+                        help="FRED-style CSV files, directories of them or manifest files (default: T10YIE.csv)")
+    parser.add_argument("--out-dir", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--dpi", type=int, default=150, help="image resolution (default: 150)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--format", choices=["png", "pdf"], default="png", help="file format for single figures")
+    parser.add_argument("--multipage", action="store_true", help="write one multi-page PDF per series instead")
+    parser.add_argument("--no-downsample", action="store_true",
+                        help="draw every observation instead of ~2 points per pixel in the line views")
+    args = parser.parse_args(argv)
+
+    paths = [p for source in args.series for p in multi_series.discover_series(source)]
+    series = load_many(paths) if len(paths) > 1 else {d.name: d for d in map(load_series, paths)}
+    for name in series:
+        os.makedirs(os.path.join(args.out_dir, "" if args.multipage else name), exist_ok=True)
+    for name, data in series.items():
+        export_series(data, os.path.join(args.out_dir, name))
+    options = {"out_dir": args.out_dir, "dpi": args.dpi, "format": args.format, "decimate": not args.no_downsample}
+
+    if args.multipage:
+        tasks = [(name, None) for name in series]
+    else:
+        tasks = [(name, i) for name in series for i in range(len(VISUALIZATIONS))]
+
+    if args.workers <= 1:
+        _init_worker(series, options)
+        for path in map(_render_task, tasks):
+            print(path)
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(series, options)) as pool:
+            for path in pool.map(_render_task, tasks):
+                print(path)
+
+
+if __name__ == "__main__":
+    #`streamlit run` executes this file as __main__ too (with streamlit already imported), so check which one
+    #started us without importing streamlit for plain command-line runs
+    started_by_streamlit = False
+    if "streamlit" in sys.modules:
+        from streamlit import runtime
+        started_by_streamlit = runtime.exists()
+    if started_by_streamlit:
+        run_streamlit()
+    else:
+        main()
 
 # End of Script
 
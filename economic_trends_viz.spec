@@ -1,16 +1,36 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+# The frozen executable is the headless report pack (`python economic_trends_viz.py ...`), which draws with
+# the Agg/PDF backends only. Everything below is pulled in transitively but never used by it.
+EXCLUDES = [
+    # Streamlit page and its server stack (the page runs via `streamlit run`, not from the bundle)
+    'streamlit', 'tornado', 'altair', 'pydeck', 'watchdog', 'git',
+    # Interactive GUI toolkits / matplotlib backends
+    'tkinter', '_tkinter', 'PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'wx', 'gi',
+    # Optional scientific extras (seaborn falls back to its bundled KDE without scipy)
+    'scipy', 'numba', 'llvmlite', 'statsmodels', 'sklearn',
+    # Optional pandas I/O backends
+    'sqlalchemy', 'openpyxl', 'xlrd', 'tables', 'fsspec', 'jinja2', 'lxml',
+    # Notebook, test and packaging tooling
+    'IPython', 'jupyter', 'notebook', 'ipykernel', 'pytest', 'setuptools', 'pkg_resources', 'docutils', 'sphinx',
+]
+
+# Imported lazily by name (lazy_imports.lazy_module), so static analysis does not see them
+HIDDEN_IMPORTS = [
+    'matplotlib.pyplot', 'matplotlib.backends.backend_agg', 'matplotlib.backends.backend_pdf', 'seaborn',
+]
 
 a = Analysis(
     ['economic_trends_viz.py'],
     pathex=[],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    # Events catalog read by the "Annotated Events" view (events.load_catalog)
+    datas=[('events.csv', '.')],
+    hiddenimports=HIDDEN_IMPORTS,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=EXCLUDES,
     noarchive=False,
     optimize=0,
 )
@@ -0,0 +1,183 @@
+#Economic-events catalog for the "Annotated Events" views
+#Events (FOMC decisions, CPI releases, geopolitical shocks, ...) are read from a CSV catalog with
+#date,label,category columns (events.csv next to this file, or T10YIE_EVENTS) instead of being hardcoded, so it
+#can hold thousands of entries. All of them are resolved to their nearest observation in one searchsorted
+#as-of join - weekends and holidays land on the closest trading day - and the rate change and volatility over
+#the observations before and after each event come from prefix sums, in one batch for the whole catalog.
+#Drawing is culled to the visible range: one line collection per category and at most MAX_LABELS text labels.
+
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+EVENTS_PATH = os.environ.get("T10YIE_EVENTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "events.csv"))
+#Observations before/after an event used for its change and volatility
+EVENT_WINDOW = 20
+#Events further than this from any observation are left unresolved
+MAX_GAP_DAYS = 7
+#Text labels drawn at most; the rest of the visible events only get their line
+MAX_LABELS = 12
+
+CATEGORY_COLORS = {
+    "health": "red",
+    "geopolitical": "orange",
+    "fomc": "green",
+    "cpi": "purple",
+    "financial": "saddlebrown",
+    #Markers found in the data by regimes.py
+    "regime": "black",
+    "anomaly": "deeppink",
+}
+OTHER_COLOR = "gray"
+
+EventCatalog = namedtuple("EventCatalog", ["dates", "labels", "categories"])
+#Per resolved event: the observation row it was joined to and its pre/post window statistics
+EventWindows = namedtuple("EventWindows", [
+    "dates", "labels", "categories", "rows", "observed", "rate",
+    "pre_change", "post_change", "pre_vol", "post_vol",
+])
+
+
+@lru_cache(maxsize=4)
+def _read_catalog(path, mtime_ns, size):
+    df = pd.read_csv(path, usecols=["date", "label", "category"], dtype={"label": str, "category": str})
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df = df.dropna(subset=["date", "label"]).sort_values("date", kind="stable")
+    return EventCatalog(
+        dates=df["date"].to_numpy("datetime64[ns]"),
+        labels=df["label"].to_numpy(object),
+        categories=df["category"].fillna("other").str.lower().to_numpy(object),
+    )
+
+
+#Catalog sorted by date; re-read only when the file changes (empty when there is no catalog file)
+#(mtime_ns, size) of the catalog file, None when there is none - changes whenever the catalog is edited
+def catalog_stamp(path=EVENTS_PATH):
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+def load_catalog(path=EVENTS_PATH):
+    stamp = catalog_stamp(path)
+    if stamp is None:
+        empty = np.array([], dtype=object)
+        return EventCatalog(np.array([], dtype="datetime64[ns]"), empty, empty)
+    return _read_catalog(path, *stamp)
+
+
+#One date-sorted catalog from several (e.g. the file plus regimes.as_catalog)
+def merge(*catalogs):
+    dates = np.concatenate([c.dates for c in catalogs]).astype("datetime64[ns]")
+    order = np.argsort(dates, kind="stable")
+    return EventCatalog(
+        dates=dates[order],
+        labels=np.concatenate([c.labels for c in catalogs])[order],
+        categories=np.concatenate([c.categories for c in catalogs])[order],
+    )
+
+
+#Row of the nearest observation for each event date (-1 when none is within max_gap_days)
+def nearest_rows(dates, event_dates, max_gap_days=MAX_GAP_DAYS):
+    obs = np.asarray(dates).astype("datetime64[ns]").view(np.int64)
+    ev = np.asarray(event_dates).astype("datetime64[ns]").view(np.int64)
+    if len(obs) == 0:
+        return np.full(len(ev), -1)
+    right = np.clip(np.searchsorted(obs, ev), 0, len(obs) - 1)
+    left = np.clip(right - 1, 0, len(obs) - 1)
+    rows = np.where(np.abs(ev - obs[left]) <= np.abs(obs[right] - ev), left, right)
+    too_far = np.abs(obs[rows] - ev) > max_gap_days * 86_400 * 10**9
+    return np.where(too_far, -1, rows)
+
+
+def _prefix(values):
+    return np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+
+#Sample standard deviation of rates[lo:hi] per event from the prefix sums (NaN under 2 observations)
+def _window_std(sum_y, sum_yy, lo, hi):
+    n = (hi - lo).astype(np.float64)
+    s, ss = sum_y[hi] - sum_y[lo], sum_yy[hi] - sum_yy[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (ss - s * s / n) / (n - 1)
+    return np.where(n >= 2, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+#Joins the catalog to the series and computes, per event, the rate change over the `window` observations
+#leading into it and following it, and the volatility (std) of those observations
+#sums=(prefix sum of rates, prefix sum of squares) reuses ones already built (e.g. the zoom index)
+def annotate(catalog, dates, rates, window=EVENT_WINDOW, max_gap_days=MAX_GAP_DAYS, sums=None):
+    rows = nearest_rows(dates, catalog.dates, max_gap_days)
+    keep = rows >= 0
+    rows = rows[keep]
+    y = np.asarray(rates, dtype=np.float64)
+    n = len(y)
+    sum_y, sum_yy = sums if sums is not None else (_prefix(y), _prefix(y * y))
+
+    before = rows - window
+    after = rows + window
+    rate = y[rows]
+    pre_change = np.where(before >= 0, rate - y[np.maximum(before, 0)], np.nan)
+    post_change = np.where(after < n, y[np.minimum(after, n - 1)] - rate, np.nan)
+    pre_vol = _window_std(sum_y, sum_yy, np.maximum(before, 0), rows)
+    post_vol = _window_std(sum_y, sum_yy, rows + 1, np.minimum(after + 1, n))
+    return EventWindows(
+        dates=catalog.dates[keep],
+        labels=catalog.labels[keep],
+        categories=catalog.categories[keep],
+        rows=rows,
+        observed=np.asarray(dates)[rows],
+        rate=rate,
+        pre_change=pre_change,
+        post_change=post_change,
+        pre_vol=pre_vol,
+        post_vol=post_vol,
+    )
+
+
+#Slice of the (date-sorted) events between start and end, inclusive
+def visible(events, start, end):
+    lo = np.searchsorted(events.dates, np.datetime64(start, "ns"), side="left")
+    hi = np.searchsorted(events.dates, np.datetime64(end, "ns"), side="right")
+    return EventWindows(*(field[lo:hi] for field in events))
+
+
+def color(category):
+    return CATEGORY_COLORS.get(category, OTHER_COLOR)
+
+
+#Draws the events between start and end: one dashed line collection per category (labelled with the
+#category for the legend) and text for up to max_labels events - the largest post-event moves when crowded
+def draw(ax, events, start, end, y_text, max_labels=MAX_LABELS):
+    shown = visible(events, start, end)
+    for category in pd.unique(shown.categories):
+        mask = shown.categories == category
+        ax.vlines(shown.dates[mask], 0, 1, transform=ax.get_xaxis_transform(), colors=color(category),
+                  linestyles="--", alpha=0.7, label=category.upper() if len(category) <= 4 else category.title())
+    labelled = np.arange(len(shown.dates))
+    if len(labelled) > max_labels:
+        move = np.nan_to_num(np.abs(shown.post_change))
+        labelled = np.sort(np.argsort(-move, kind="stable")[:max_labels])
+    for i in labelled:
+        ax.text(shown.dates[i], y_text, shown.labels[i], rotation=90, color=color(shown.categories[i]), fontsize=10, va="center")
+    return shown
+
+
+#Table of the event-window statistics, one row per event
+def frame(events, window=EVENT_WINDOW):
+    return pd.DataFrame({
+        "Date": events.dates,
+        "Event": events.labels,
+        "Category": events.categories,
+        "Observed": events.observed,
+        "Rate": events.rate,
+        f"Change {window} obs before": events.pre_change,
+        f"Change {window} obs after": events.post_change,
+        f"Std {window} obs before": events.pre_vol,
+        f"Std {window} obs after": events.post_vol,
+    })
@@ -0,0 +1,159 @@
+#Aggregate exports for downstream jobs
+#The yearly, monthly and rolling aggregates and the extremes of a series are written as Arrow IPC (uncompressed,
+#so readers can memory-map the columns instead of parsing text), Parquet (compact, for data tools) and CSV
+#(for compatibility). pyarrow is optional: without it only the CSV files are written.
+#Every table carries a hash of its contents, kept in a manifest next to the files, and a table whose hash and
+#files are unchanged is not written again - rerunning on the same data touches nothing on disk.
+
+import hashlib
+import io
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+import rolling
+
+EXPORT_FORMAT = 1
+FORMATS = ["arrow", "parquet", "csv"]
+EXTENSIONS = {"arrow": ".arrow", "parquet": ".parquet", "csv": ".csv"}
+MIME_TYPES = {"arrow": "application/vnd.apache.arrow.file", "parquet": "application/vnd.apache.parquet",
+              "csv": "text/csv"}
+TABLES = ["yearly", "monthly", "rolling", "extremes"]
+
+#status: "written" or "unchanged"
+ExportResult = namedtuple("ExportResult", ["table", "hash", "status", "files"])
+
+_pyarrow = None
+
+
+#pyarrow module, or None when it is not installed
+def _arrow():
+    global _pyarrow
+    if _pyarrow is None:
+        try:
+            import pyarrow
+            import pyarrow.feather
+            import pyarrow.parquet
+            _pyarrow = pyarrow
+        except ImportError:
+            _pyarrow = False
+    return _pyarrow or None
+
+
+#Formats that can be written here
+def available_formats():
+    return FORMATS if _arrow() else ["csv"]
+
+
+#{table: DataFrame} of a series' aggregates; rolling_stats is rolling.compute output (all windows in one table)
+def tables(stats, annual_avg, monthly_avg, highest, lowest, rolling_stats=None):
+    if rolling_stats is None:
+        rolling_stats = rolling.compute(stats.dates, stats.rates)
+    cells = monthly_avg.stack().dropna()
+    frame = {"Date": np.asarray(stats.dates).astype("datetime64[ns]"), "Rate": np.asarray(stats.rates)}
+    for spec, r in rolling_stats.items():
+        frame.update({f"{field}_{spec}": getattr(r, field)
+                      for field in ("mean", "std", "min", "max", "zscore")})
+    return {
+        "yearly": annual_avg,
+        "monthly": pd.DataFrame({
+            "Year": cells.index.get_level_values("Year").to_numpy(np.int64),
+            "Month": cells.index.get_level_values("Month").to_numpy(np.int64),
+            "Rate": cells.to_numpy(),
+        }),
+        "rolling": pd.DataFrame(frame),
+        "extremes": pd.DataFrame({
+            "Kind": ["highest", "lowest"],
+            "Date": pd.to_datetime([highest.date, lowest.date]),
+            "Rate": [highest.rate, lowest.rate],
+        }),
+    }
+
+
+#SHA-256 of a table's column names, types and values (independent of the file format)
+def content_hash(frame):
+    digest = hashlib.sha256(f"{EXPORT_FORMAT}".encode())
+    for name, dtype in frame.dtypes.items():
+        digest.update(f"{name}:{dtype};".encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+#Serialized table in one of FORMATS
+def to_bytes(frame, fmt):
+    if fmt == "csv":
+        return frame.to_csv(index=False).encode("utf-8")
+    pa = _arrow()
+    if pa is None:
+        raise RuntimeError(f"pyarrow is needed for {fmt} exports")
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    buf = io.BytesIO()
+    if fmt == "arrow":
+        pa.feather.write_feather(table, buf, compression="uncompressed")
+    else:
+        pa.parquet.write_table(table, buf)
+    return buf.getvalue()
+
+
+#Writes data unless the file already holds exactly these bytes; returns whether it wrote
+def write_if_changed(path, data):
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    data_cache.write_atomic(path, data)
+    return True
+
+
+def manifest_path(out_dir, name):
+    return os.path.join(out_dir, f"{name}.manifest.json")
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("format") == EXPORT_FORMAT else {}
+
+
+#Writes every table as <name>_<table>.<ext> in out_dir, skipping tables whose hash and files are unchanged;
+#returns [ExportResult]
+def export(frames, out_dir, name, formats=None, version=None):
+    formats = [f for f in (formats or available_formats()) if f in available_formats()]
+    os.makedirs(out_dir, exist_ok=True)
+    path = manifest_path(out_dir, name)
+    previous = _read_manifest(path).get("tables", {})
+    entries, results = {}, []
+    for table, frame in frames.items():
+        digest = content_hash(frame)
+        files = {fmt: f"{name}_{table}{EXTENSIONS[fmt]}" for fmt in formats}
+        old = previous.get(table, {})
+        unchanged = (old.get("hash") == digest
+                     and all(old.get("files", {}).get(fmt) == file and os.path.exists(os.path.join(out_dir, file))
+                             for fmt, file in files.items()))
+        if not unchanged:
+            for fmt, file in files.items():
+                data_cache.write_atomic(os.path.join(out_dir, file), to_bytes(frame, fmt))
+        entries[table] = {"hash": digest, "rows": len(frame), "columns": list(frame.columns), "files": files}
+        results.append(ExportResult(table, digest, "unchanged" if unchanged else "written",
+                                    [os.path.join(out_dir, f) for f in files.values()]))
+    manifest = {"format": EXPORT_FORMAT, "series": name, "version": None if version is None else str(version),
+                "tables": dict(previous, **entries)}
+    write_if_changed(path, json.dumps(manifest, indent=1).encode("utf-8"))
+    return results
+
+
+#Memory-mapped pyarrow Table of an Arrow IPC export (the columns are read from the page cache, not copied)
+def read_arrow(path):
+    pa = _arrow()
+    if pa is None:
+        raise RuntimeError("pyarrow is needed to read Arrow exports")
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
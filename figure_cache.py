@@ -0,0 +1,55 @@
+#Cache of rendered figures (PNG/SVG bytes) shared by every Streamlit session
+#Entries are keyed by (visualization, parameters, data version) and evicted least-recently-used
+#once the stored bytes go over the budget, so a repeated view never touches matplotlib.
+
+import io
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+#Same defaults st.pyplot uses, so cached images look identical to the old output
+SAVEFIG_DEFAULTS = {"bbox_inches": "tight", "dpi": 200}
+
+
+def figure_bytes(fig, fmt="png", **savefig_kwargs):
+    options = dict(SAVEFIG_DEFAULTS, **savefig_kwargs)
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, **options)
+    return buf.getvalue()
+
+
+class FigureCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        #A single image bigger than the whole budget is simply not cached
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            self._entries[key] = data
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def __len__(self):
+        return len(self._entries)
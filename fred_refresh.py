@@ -0,0 +1,289 @@
+#Refresh of the series CSVs from a FRED-compatible endpoint
+#Each series asks only for the observations after the last date already in its CSV
+#(fredgraph.csv?id=<ID>&cosd=<next day>), with If-None-Match/If-Modified-Since from the previous answer to the
+#same request, so an unchanged series costs one 304. New rows are appended by writing a copy of the file and
+#renaming it over the original, so readers never see a half-written CSV - and since the old bytes are kept
+#as they were, data_cache only parses the new tail. Requests for many series run concurrently on asyncio over a
+#small pool of keep-alive connections (stdlib only, no HTTP client dependency).
+#
+#  python fred_refresh.py [CSV/dir/manifest ...] [--base-url URL] [--connections 4]
+#
+#fred_server.py serves the bundled CSVs the same way for offline testing:
+#  python fred_server.py --port 8765 &  python fred_refresh.py --base-url http://127.0.0.1:8765
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import ssl
+import sys
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlencode, urlsplit
+
+import data_cache
+import multi_series
+
+BASE_URL = os.environ.get("T10YIE_FRED_URL", "https://fred.stlouisfed.org")
+GRAPH_PATH = "/graph/fredgraph.csv"
+CONNECTIONS = 4
+TIMEOUT = 30
+USER_AGENT = "economic-trends-viz/1.0"
+
+#status: "updated" (rows_added > 0), "not-modified" (304) or "current" (answered, nothing newer)
+RefreshResult = namedtuple("RefreshResult", ["series", "path", "status", "rows_added", "last_date"])
+Response = namedtuple("Response", ["status", "headers", "body"])
+
+
+class RefreshError(Exception):
+    pass
+
+
+#Keep-alive HTTP/1.1 connections to one host, at most `size` in use at a time
+class ConnectionPool:
+    def __init__(self, base_url=BASE_URL, size=CONNECTIONS, timeout=TIMEOUT):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.tls = url.scheme == "https"
+        self.port = url.port or (443 if self.tls else 80)
+        self.prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+
+    async def _connect(self):
+        context = ssl.create_default_context() if self.tls else None
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=context), self.timeout)
+
+    async def get(self, path, query=None, headers=None):
+        target = self.prefix + path + ("?" + urlencode(query) if query else "")
+        async with self._slots:
+            #A pooled connection may have been closed by the server meanwhile; retry once on a fresh one
+            for attempt in range(2):
+                reused = bool(self._idle)
+                conn = self._idle.pop() if reused else await self._connect()
+                try:
+                    response, keep = await asyncio.wait_for(self._exchange(conn, target, headers or {}), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError, RefreshError):
+                    conn[1].close()
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    conn[1].close()
+                    raise
+                if keep:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return response
+
+    async def _exchange(self, conn, target, headers):
+        reader, writer = conn
+        lines = [f"GET {target} HTTP/1.1", f"Host: {self.host}", f"User-Agent: {USER_AGENT}",
+                 "Accept-Encoding: identity", "Connection: keep-alive"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise RefreshError(f"bad status line {status_line!r}")
+        status = int(parts[1])
+        response_headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        keep = response_headers.get("connection", "").lower() != "close" and parts[0] == "HTTP/1.1"
+        if status == 304 or 100 <= status < 200 or status == 204:
+            body = b""
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    while (await reader.readline()).strip():
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in response_headers:
+            body = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep = False
+        return Response(status, response_headers, body), keep
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+#FRED id of a series CSV (the value column of its observation_date,<ID> header, else the file name)
+def series_id(path):
+    with open(path, encoding="utf-8") as f:
+        header = f.readline().strip().split(",")
+    if len(header) == 2 and header[0] == multi_series.FRED_HEADER and header[1]:
+        return header[1]
+    return multi_series.series_name(path)
+
+
+#Date of the last row, read from the end of the file; None for a file without observations
+def last_date(path):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        f.seek(max(0, end - 4096))
+        lines = f.read().splitlines()
+    for line in reversed(lines):
+        field = line.split(b",")[0].strip().decode("ascii", "replace")
+        try:
+            return date.fromisoformat(field[:10])
+        except ValueError:
+            continue
+    return None
+
+
+#Validators of the last answer, kept with the series' cache files
+def _state_path(path):
+    return os.path.join(data_cache.cache_paths(path)["dir"], os.path.basename(path) + ".fred.json")
+
+
+def _read_state(path):
+    try:
+        with open(_state_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(path, state):
+    state_path = _state_path(path)
+    try:
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        data_cache.write_atomic(state_path, json.dumps(state, indent=1).encode("utf-8"))
+    except OSError:
+        pass
+
+
+#Rows of a fredgraph CSV body dated after `after`, as raw lines (cleaning stays with data_cache)
+def new_rows(body, after):
+    rows = []
+    for line in body.decode("utf-8").splitlines()[1:]:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            day = date.fromisoformat(line.split(",")[0][:10])
+        except ValueError:
+            continue
+        if after is None or day > after:
+            rows.append(line)
+    return rows
+
+
+#Appends lines to the CSV through a copy in the same folder renamed over it
+def append_atomic(path, lines):
+    tmp = path + ".refresh.tmp"
+    try:
+        shutil.copyfile(path, tmp)
+        with open(tmp, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write(("\n".join(lines) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        #Permissions only: the mtime must show the write, mtime-keyed caches rely on it
+        shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+async def refresh_series(pool, path):
+    name = series_id(path)
+    last = last_date(path)
+    query = {"id": name}
+    if last is not None:
+        query["cosd"] = (last + timedelta(days=1)).isoformat()
+    key = urlencode(query)
+
+    state = _read_state(path)
+    headers = {}
+    if state.get("query") == key:
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+    response = await pool.get(GRAPH_PATH, query, headers)
+    if response.status == 304:
+        return RefreshResult(name, path, "not-modified", 0, last)
+    if response.status != 200:
+        raise RefreshError(f"{name}: HTTP {response.status}")
+
+    rows = new_rows(response.body, last)
+    if rows:
+        append_atomic(path, rows)
+    _write_state(path, {
+        "query": key,
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "checked": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    })
+    if rows:
+        return RefreshResult(name, path, "updated", len(rows), last_date(path))
+    return RefreshResult(name, path, "current", 0, last)
+
+
+#Refreshes all the series concurrently over one pool; failures come back as exceptions in the list
+async def refresh_all(paths, base_url=BASE_URL, connections=CONNECTIONS, timeout=TIMEOUT):
+    pool = ConnectionPool(base_url, connections, timeout)
+    try:
+        return await asyncio.gather(*(refresh_series(pool, p) for p in paths), return_exceptions=True)
+    finally:
+        await pool.close()
+
+
+def refresh(paths, base_url=BASE_URL, connections=CONNECTIONS, timeout=TIMEOUT):
+    return asyncio.run(refresh_all(list(paths), base_url, connections, timeout))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch new observations for FRED series CSVs.")
+    parser.add_argument("series", nargs="*", help="series CSVs, directories of them or manifest files "
+                                                  "(default: the data folder)")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"FRED-compatible endpoint (default: {BASE_URL})")
+    parser.add_argument("--connections", type=int, default=CONNECTIONS, help="concurrent connections")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="seconds per request")
+    args = parser.parse_args(argv)
+
+    sources = args.series or [os.environ.get("T10YIE_DATA_DIR", os.path.dirname(os.path.abspath(__file__)))]
+    paths = [p for source in sources for p in multi_series.discover_series(source)]
+    failed = 0
+    for path, result in zip(paths, refresh(paths, args.base_url, args.connections, args.timeout)):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"{multi_series.series_name(path)}: failed ({result})")
+        else:
+            print(f"{result.series}: {result.status}, {result.rows_added} new rows, last {result.last_date}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
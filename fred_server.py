@@ -0,0 +1,98 @@
+#Local stand-in for the FRED CSV endpoint, for testing fred_refresh offline
+#Serves GET /graph/fredgraph.csv?id=<ID>[&cosd=YYYY-MM-DD][&coed=YYYY-MM-DD] from the series CSVs of a folder
+#(<ID>.csv, as downloaded from FRED), over keep-alive HTTP/1.1 with an ETag and Last-Modified on every answer
+#and 304 for a matching If-None-Match / If-Modified-Since.
+#
+#  python fred_server.py [--dir DATA_DIR] [--port 8765]
+
+import argparse
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import fred_refresh
+
+PORT = 8765
+
+
+#Header plus the rows between start and end (ISO dates, inclusive; None for open ends)
+def observations(path, start=None, end=None):
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    rows = [line for line in lines[1:] if line.strip()
+            and (start is None or line[:10] >= start) and (end is None or line[:10] <= end)]
+    return "\n".join([lines[0]] + rows) + "\n"
+
+
+class FredHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    data_dir = "."
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = os.path.join(self.data_dir, os.path.basename(query.get("id", "")) + ".csv")
+        if url.path != fred_refresh.GRAPH_PATH or "id" not in query or not os.path.isfile(path):
+            return self._send(404, b"Series not found\n", {})
+
+        body = observations(path, query.get("cosd"), query.get("coed")).encode("utf-8")
+        modified = datetime.fromtimestamp(int(os.stat(path).st_mtime), timezone.utc)
+        headers = {
+            "ETag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            "Last-Modified": format_datetime(modified, usegmt=True),
+            "Content-Type": "text/csv",
+        }
+        if self._not_modified(headers["ETag"], modified):
+            return self._send(304, b"", headers)
+        self._send(200, body, headers)
+
+    def _not_modified(self, etag, modified):
+        if "If-None-Match" in self.headers:
+            return etag in [t.strip() for t in self.headers["If-None-Match"].split(",")]
+        if "If-Modified-Since" in self.headers:
+            try:
+                return modified <= parsedate_to_datetime(self.headers["If-Modified-Since"])
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(data_dir, host="127.0.0.1", port=PORT):
+    handler = type("Handler", (FredHandler,), {"data_dir": data_dir})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve series CSVs like the FRED fredgraph.csv endpoint.")
+    parser.add_argument("--dir", default=os.path.dirname(os.path.abspath(__file__)), help="folder of <ID>.csv files")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args(argv)
+    server = make_server(args.dir, args.host, args.port)
+    print(f"Serving {args.dir} on http://{args.host}:{server.server_address[1]}{fred_refresh.GRAPH_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
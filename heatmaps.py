@@ -0,0 +1,134 @@
+#Heatmaps drawn as one image
+#The cell matrix is built with vectorised binning (np.bincount over row/column codes) and drawn with a single
+#imshow, so the cost barely depends on the number of cells. Values are written into the cells only when a
+#cell is large enough for its label at the figure's size, and then all of them are one PathCollection artist.
+#Layouts: Year x Month (from the Analytics monthly_avg), Year x Day-of-year, and Series x Period for a
+#multi_series.SeriesMatrix.
+
+from collections import namedtuple
+
+import numpy as np
+
+Grid = namedtuple("Grid", ["values", "row_labels", "col_labels", "row_title", "col_title"])
+
+#Tick labels shown per axis at most (the rest are skipped evenly)
+MAX_TICKS = 40
+FONT_SIZE = 10
+
+
+#Mean of `values` per (row, col) cell, NaN for empty cells
+def bin_means(rows, cols, values, n_rows, n_cols):
+    code = np.asarray(rows, dtype=np.int64) * n_cols + np.asarray(cols, dtype=np.int64)
+    weights = np.asarray(values, dtype=np.float64)
+    sums = np.bincount(code, weights=weights, minlength=n_rows * n_cols)
+    counts = np.bincount(code, minlength=n_rows * n_cols)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums / counts).reshape(n_rows, n_cols)
+
+
+#Year x Month grid of an Analytics monthly_avg frame (already binned by analytics.period_sums)
+def year_month(monthly_avg):
+    return Grid(monthly_avg.to_numpy(dtype=np.float64), [str(y) for y in monthly_avg.index],
+                [str(m) for m in monthly_avg.columns], "Year", "Month")
+
+
+#Year x Day-of-year means (day 366 only holds leap-year Dec 31)
+def year_day(dates, rates):
+    days = np.asarray(dates).astype("datetime64[D]")
+    years = days.astype("datetime64[Y]")
+    doy = (days - years.astype("datetime64[D]")).astype(np.int64)
+    year_num = years.astype(np.int64) + 1970
+    first = int(year_num.min())
+    n_years = int(year_num.max()) - first + 1
+    values = bin_means(year_num - first, doy, rates, n_years, 366)
+    return Grid(values, [str(first + i) for i in range(n_years)], [str(d) for d in range(1, 367)],
+                "Year", "Day of Year")
+
+
+#Series x Period means of a SeriesMatrix; period is "Y", "Q" or "M"
+def series_period(matrix, period="Y", start=None, end=None):
+    dates = np.asarray(matrix.dates)
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "ns"))
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "ns") + np.timedelta64(1, "D"))
+    dates, values, mask = dates[lo:hi], matrix.values[lo:hi], matrix.mask[lo:hi]
+    if len(dates) == 0:
+        raise ValueError("No observations in the selected range")
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    step = {"Y": 12, "Q": 3, "M": 1}[period]
+    codes = months // step
+    first = int(codes.min())
+    n_periods = int(codes.max()) - first + 1
+    row, col = np.nonzero(mask)
+    grid = bin_means(col, codes[row] - first, values[row, col], values.shape[1], n_periods)
+    periods = np.arange(first, first + n_periods) * step
+    if period == "Y":
+        labels = [str(m // 12 + 1970) for m in periods]
+    elif period == "Q":
+        labels = [f"{m // 12 + 1970}Q{m % 12 // 3 + 1}" for m in periods]
+    else:
+        labels = [f"{m // 12 + 1970}-{m % 12 + 1:02d}" for m in periods]
+    title = {"Y": "Year", "Q": "Quarter", "M": "Month"}[period]
+    return Grid(grid, list(matrix.names), labels, "Series", title)
+
+
+def _ticks(n):
+    step = max(1, -(-n // MAX_TICKS))
+    return np.arange(0, n, step)
+
+
+#Whether cell labels like `sample` fit in the cells of a rows x cols grid on ax
+def cells_fit(ax, rows, cols, sample, fontsize=FONT_SIZE):
+    box = ax.get_position()
+    width_pt = box.width * ax.figure.get_figwidth() * 72 / cols
+    height_pt = box.height * ax.figure.get_figheight() * 72 / rows
+    return width_pt >= 0.65 * fontsize * (len(sample) + 1) and height_pt >= 1.4 * fontsize
+
+
+#Centred text labels at data positions (x, y) as a single PathCollection: each distinct label is laid out once
+#as a glyph path (in points) and every cell only adds an offset and a colour, so no Text artist per cell
+def draw_labels(ax, x, y, texts, colors, fontsize=FONT_SIZE):
+    from matplotlib.collections import PathCollection
+    from matplotlib.textpath import TextPath
+    from matplotlib.transforms import Affine2D
+
+    unique, inverse = np.unique(np.asarray(texts, dtype=str), return_inverse=True)
+    glyphs = []
+    for text in unique:
+        path = TextPath((0, 0), text, size=fontsize)
+        (x0, y0), (x1, y1) = path.get_extents().get_points()
+        glyphs.append(path.transformed(Affine2D().translate(-(x0 + x1) / 2, -(y0 + y1) / 2)))
+    labels = PathCollection([glyphs[i] for i in inverse.ravel()], offsets=np.column_stack([x, y]),
+                            offset_transform=ax.transData,
+                            transform=Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans,
+                            facecolors=colors, edgecolors="none")
+    ax.add_collection(labels, autolim=False)
+    return labels
+
+
+#Draws the grid as one image with a colorbar; annotate=None labels the cells only when they fit
+def draw(ax, grid, cmap="YlGnBu", fmt="{:.2f}", annotate=None, colorbar=True, fontsize=FONT_SIZE):
+    values = np.ma.masked_invalid(grid.values)
+    n_rows, n_cols = values.shape
+    image = ax.imshow(values, cmap=cmap, aspect="auto", interpolation="nearest")
+    if colorbar:
+        ax.figure.colorbar(image, ax=ax)
+
+    rows, cols = _ticks(n_rows), _ticks(n_cols)
+    ax.set_yticks(rows)
+    ax.set_yticklabels([grid.row_labels[i] for i in rows])
+    ax.set_xticks(cols)
+    ax.set_xticklabels([grid.col_labels[i] for i in cols], rotation=90 if n_cols > 24 else 0)
+    ax.set_ylabel(grid.row_title)
+    ax.set_xlabel(grid.col_title)
+
+    present = ~values.mask if np.ndim(values.mask) else np.ones(values.shape, dtype=bool)
+    if annotate is None:
+        filled = grid.values[present]
+        annotate = len(filled) > 0 and cells_fit(ax, n_rows, n_cols, fmt.format(np.nanmax(np.abs(filled))), fontsize)
+    if annotate:
+        r, c = np.nonzero(present)
+        cell = grid.values[r, c]
+        #Light text on the dark half of the colormap
+        colors = np.where(image.norm(cell) > 0.6, "white", "black")
+        draw_labels(ax, c, r, [fmt.format(v) for v in cell], colors, fontsize)
+    return image
@@ -0,0 +1,149 @@
+#Incremental refresh of the derived series when new observations are appended
+#SeriesState keeps the running pieces of analytics.Analytics: the rolling statistics of every rolling.WINDOWS
+#window (the 90-row one is the Analytics rolling mean/std), the per-year and per-month sums/counts, the extremes
+#and the regression prefix sums (trends.RegressionState). update() only processes the rows added since the
+#last call (the rates of the longest window before them are reused for the rolling values), and rebuilds from
+#scratch when the cache reports a full rebuild.
+#Snapshots use compact dtypes - int32 day offsets, float32 rates and rolling values - while the sums behind
+#the aggregates, extremes and regression stay in float64.
+
+import threading
+
+import numpy as np
+
+import analytics
+import rolling
+import trends
+
+ROLLING_WINDOW = analytics.ROLLING_WINDOW
+
+
+#Adds a block of (years x 12) sums that starts at `first_year` into `total`, which starts at `base_year`
+def _add_years(total, base_year, block, first_year):
+    offset = first_year - base_year
+    needed = offset + len(block)
+    if needed > len(total):
+        total = np.concatenate((total, np.zeros((needed - len(total), 12), dtype=total.dtype)))
+    total[offset:needed] += block
+    return total
+
+
+class SeriesState:
+    def __init__(self, window=ROLLING_WINDOW, windows=rolling.WINDOWS):
+        self.window = window
+        self.windows = list(dict.fromkeys(list(windows) + [str(window)]))
+        self.lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, lineage):
+        self.lineage = lineage
+        self.version = None
+        self.rows = 0
+        self._dates = None
+        self._origin = None
+        self._days = np.empty(0, dtype=np.int32)
+        self._years = np.empty(0, dtype=np.int32)
+        self._rates = np.empty(0, dtype=np.float32)
+        self._rolling = {spec: [np.empty(0, dtype=np.float32) for _ in rolling.RollingStats._fields[1:]]
+                         for spec in self.windows}
+        self._first_year = None
+        self._month_sum = np.zeros((0, 12))
+        self._month_count = np.zeros((0, 12), dtype=np.int64)
+        self._highest = self._lowest = None
+        self._regression = trends.RegressionState()
+        self._snapshot = None
+
+    #Brings the state up to date with a data_cache.CachedSeries; returns the number of rows processed
+    def update(self, series):
+        with self.lock:
+            return self._update(series)
+
+    #update() followed by snapshot(), atomically; returns (data version, Analytics)
+    def refresh(self, series):
+        with self.lock:
+            self._update(series)
+            return self.version, self._snapshot_locked()
+
+    def snapshot(self):
+        with self.lock:
+            return self._snapshot_locked()
+
+    #Rolling statistics of every window for the rows so far ({spec: rolling.RollingStats}); like prefix(), what
+    #is handed out stays valid across appends
+    def rolling(self):
+        with self.lock:
+            return self._rolling_locked()
+
+    def _rolling_locked(self):
+        return {spec: rolling.RollingStats(spec, *(buf[:self.rows] for buf in bufs))
+                for spec, bufs in self._rolling.items()}
+
+    #Regression prefix sums of the rows processed so far (x = the snapshot's day offsets)
+    def prefix(self):
+        with self.lock:
+            return self._regression.prefix()
+
+    def _update(self, series):
+        if series.version == self.version:
+            return 0
+        if series.lineage != self.lineage or len(series.rates) < self.rows:
+            self._reset(series.lineage)
+        start = self.rows
+        self._apply(series.dates, series.rates, start)
+        self._dates = series.dates
+        self.rows = len(series.rates)
+        self.version = series.version
+        self._snapshot = None
+        return self.rows - start
+
+    def _apply(self, dates, rates, start):
+        if start == len(rates):
+            return
+        new_dates = dates[start:]
+        new_rates = np.asarray(rates[start:], dtype=np.float64)
+
+        #Rolling statistics for the new rows only, seeded with the rows of the longest window before them
+        context = min(rolling.window_start(dates, spec, start) for spec in self.windows)
+        skip = start - context
+        computed = rolling.compute(dates[context:], rates[context:], self.windows)
+        for spec, bufs in self._rolling.items():
+            for i, values in enumerate(computed[spec][1:]):
+                bufs[i] = trends.extend_buffer(bufs[i], start, values[skip:])
+
+        #Day offsets and calendar years of the new rows
+        if self._origin is None:
+            self._origin = int(np.asarray(dates[:1]).astype("datetime64[D]").astype(np.int64)[0])
+        days = analytics.day_offsets(new_dates, self._origin)
+        self._days = trends.extend_buffer(self._days, start, days)
+        self._years = trends.extend_buffer(self._years, start, analytics.calendar_years(new_dates))
+        self._rates = trends.extend_buffer(self._rates, start, new_rates)
+
+        #Per-year and per-month sums of the new rows
+        first_year, _, _, month_sum, month_count = analytics.period_sums(new_dates, new_rates)
+        if self._first_year is None:
+            self._first_year = first_year
+        self._month_sum = _add_years(self._month_sum, self._first_year, month_sum, first_year)
+        self._month_count = _add_years(self._month_count, self._first_year, month_count, first_year)
+
+        #Extremes (first occurrence wins, like idxmax/idxmin)
+        i_max, i_min = int(new_rates.argmax()), int(new_rates.argmin())
+        if self._highest is None or new_rates[i_max] > self._highest.rate:
+            self._highest = analytics.extreme(dates, rates, start + i_max)
+        if self._lowest is None or new_rates[i_min] < self._lowest.rate:
+            self._lowest = analytics.extreme(dates, rates, start + i_min)
+
+        #Regression prefix sums just grow; the rolling/expanding trends and the zoom index read them
+        self._regression.append(days, new_rates)
+
+    def _snapshot_locked(self):
+        if self._snapshot is None and self.rows:
+            rows = self.rows
+            periods = (self._first_year, self._month_sum.sum(axis=1), self._month_count.sum(axis=1),
+                       self._month_sum, self._month_count)
+            mean, std = self._rolling[str(self.window)][:2]
+            self._snapshot = analytics.build(
+                self._dates, self._rates[:rows], self._days[:rows], self._years[:rows],
+                mean[:rows], std[:rows], periods,
+                self._highest, self._lowest, analytics.fit_line(*self._regression.totals()),
+            )
+        return self._snapshot
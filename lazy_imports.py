@@ -0,0 +1,33 @@
+#Deferred imports for the heavy plotting libraries
+#lazy_module("seaborn") returns a stand-in that imports the real module the first time one of its attributes
+#is used, so startup only pays for pyplot/seaborn once a view that draws with them actually runs.
+#How long each deferred import took is kept in IMPORT_SECONDS (see startup_report.py).
+
+import importlib
+import time
+
+IMPORT_SECONDS = {}
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            start = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            IMPORT_SECONDS.setdefault(self._name, time.perf_counter() - start)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
@@ -0,0 +1,139 @@
+#Loading many FRED series into one date-aligned matrix
+#Each series CSV (a directory of them, a manifest file or a list of paths) is loaded in parallel through the
+#on-disk cache, then all of them are laid out on one shared sorted date index as a single contiguous float32
+#(dates x series) array with a boolean mask of which cells were actually observed. The float32 matrix is for
+#storage and plotting; each series' float64 rates from the cache are kept too and the aggregates use those.
+#matrix_analytics() computes the rolling, yearly and monthly aggregates, extremes and regression sums for every
+#series at once, in one vectorized pass over the observed values.
+
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import analytics
+import data_cache
+
+#Header of a FRED download - used to tell series files apart from the app's own CSV outputs
+FRED_HEADER = "observation_date"
+
+#rates: each series' observed float64 rates (data_cache), in date order
+SeriesMatrix = namedtuple("SeriesMatrix", ["names", "paths", "dates", "values", "mask", "versions", "rates"])
+
+
+def _is_series_csv(path):
+    try:
+        with open(path) as f:
+            return f.readline().startswith(FRED_HEADER)
+    except OSError:
+        return False
+
+
+#Resolves a directory, a manifest (.json list / {"series": [...]}, or one path per line) or a list of paths
+def discover_series(source):
+    if isinstance(source, (list, tuple)):
+        return list(source)
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(".csv"))
+        return [p for p in (os.path.join(source, n) for n in names) if _is_series_csv(p)]
+    if source.lower().endswith(".csv"):
+        return [source]
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source) as f:
+        if source.lower().endswith(".json"):
+            entries = json.load(f)
+            if isinstance(entries, dict):
+                entries = entries["series"]
+        else:
+            entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [os.path.join(base, p) for p in entries]
+
+
+def series_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def load_series_matrix(source, workers=None):
+    paths = discover_series(source)
+    if not paths:
+        raise FileNotFoundError(f"No series CSVs found in {source}")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        loaded = list(pool.map(data_cache.load_clean_series, paths))
+
+    dates = np.unique(np.concatenate([s.dates for s in loaded]))
+    values = np.full((len(dates), len(loaded)), np.nan, dtype=np.float32)
+    rates = []
+    for j, s in enumerate(loaded):
+        rows = np.searchsorted(dates, s.dates)
+        #A repeated date keeps its last rate, like the matrix cell it overwrites
+        last = np.concatenate((rows[1:] != rows[:-1], [True]))[:len(rows)]
+        values[rows[last], j] = s.rates[last]
+        rates.append(np.asarray(s.rates, dtype=np.float64)[last])
+    mask = ~np.isnan(values)
+    return SeriesMatrix(
+        names=[series_name(p) for p in paths],
+        paths=paths,
+        dates=dates,
+        values=values,
+        mask=mask,
+        versions=tuple(s.version for s in loaded),
+        rates=rates,
+    )
+
+
+#Observed (dates, rates) of one series
+def column(matrix, name):
+    j = matrix.names.index(name)
+    rows = matrix.mask[:, j]
+    return matrix.dates[rows], matrix.rates[j]
+
+
+#Analytics for every column from one pass: the observed cells are laid end to end series by series,
+#so rolling windows, bincounts and segment-wise extremes cover all series together.
+#Returns {name: analytics.Analytics}
+def matrix_analytics(matrix, window=analytics.ROLLING_WINDOW):
+    k = len(matrix.names)
+    cols, rows = np.nonzero(matrix.mask.T)
+    #Series by series in date order - the same order as the mask's observed cells below
+    flat = np.concatenate(matrix.rates)
+    dates = matrix.dates[rows]
+    counts = np.bincount(cols, minlength=k)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    seg_start = starts[cols]
+
+    mean, std = analytics.rolling_moments(flat, window, segment_starts=seg_start)
+
+    #Year/month sums for every series: one bincount over (series, month) keys
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    base = int(months.min() // 12)
+    code = months - base * 12
+    n_years = int(code.max() // 12) + 1
+    key = cols * (n_years * 12) + code
+    month_sum = np.bincount(key, weights=flat, minlength=k * n_years * 12).reshape(k, n_years, 12)
+    month_count = np.bincount(key, minlength=k * n_years * 12).reshape(k, n_years, 12)
+
+    #First occurrence of each series' max/min: sort by (series, value), stable so ties keep date order
+    high = np.lexsort((-flat, cols))[starts]
+    low = np.lexsort((flat, cols))[starts]
+
+    #Regression sums with x = days since each series' own first observation
+    day = dates.astype("datetime64[D]").astype(np.int64)
+    x = (day - day[seg_start]).astype(np.float64)
+    sums = [np.bincount(cols, weights=w, minlength=k) for w in (x, flat, x * x, x * flat, flat * flat)]
+    years = analytics.calendar_years(dates)
+
+    result = {}
+    for j, name in enumerate(matrix.names):
+        part = slice(starts[j], starts[j] + counts[j])
+        d, y = dates[part], flat[part]
+        periods = (1970 + base, month_sum[j].sum(axis=1), month_count[j].sum(axis=1), month_sum[j], month_count[j])
+        regression = analytics.fit_line(int(counts[j]), *(s[j] for s in sums))
+        result[name] = analytics.build(
+            d, y, x[part].astype(np.int64), years[part], mean[part], std[part], periods,
+            analytics.extreme(d, y, high[j] - starts[j]),
+            analytics.extreme(d, y, low[j] - starts[j]),
+            regression,
+        )
+    return result
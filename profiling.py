@@ -0,0 +1,140 @@
+#Lightweight per-stage profiling for the Streamlit app
+#A Profiler records wall time, CPU time (of the running thread) and optionally the peak traced allocation of
+#each named stage of one script run - loading, derived data, the selected view, rasterising - so slow
+#dashboards can be diagnosed on real traffic. Records can be shown in the sidebar and appended to a JSON-lines
+#log. A disabled Profiler hands out one shared no-op context, so leaving the calls in costs next to nothing.
+#Stages may nest; a parent's numbers include its children. tracemalloc is process-wide, so with several busy
+#sessions the memory peaks include allocations made by the other sessions' threads.
+
+import contextlib
+import json
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import namedtuple
+from datetime import datetime, timezone
+
+StageRecord = namedtuple("StageRecord", ["stage", "depth", "wall_s", "cpu_s", "peak_bytes"])
+
+_NULL_STAGE = contextlib.nullcontext()
+_log_lock = threading.Lock()
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_started = False
+
+
+#tracemalloc is shared by every session, so it stays on while any profiler needs it
+#(and is left alone if something else had already started it)
+def _start_tracing():
+    global _trace_users, _trace_started
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_started = True
+        _trace_users += 1
+
+
+def _stop_tracing():
+    global _trace_users, _trace_started
+    with _trace_lock:
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_started:
+            tracemalloc.stop()
+            _trace_started = False
+
+
+class _Frame:
+    __slots__ = ("name", "depth", "wall", "cpu", "base", "peak", "index")
+
+
+class Profiler:
+    def __init__(self, enabled=False, trace_memory=False, log_path=None):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.log_path = log_path
+        self.records = []
+        self._stack = []
+        if self.trace_memory:
+            _start_tracing()
+            #Released by finish(), or when the profiler is dropped by a run that never finished
+            self._release = weakref.finalize(self, _stop_tracing)
+
+    #Context manager around one stage
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name)
+
+    @contextlib.contextmanager
+    def _stage(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    #start()/stop() pair for stages that do not fit in a with block
+    def start(self, name):
+        if not self.enabled:
+            return
+        frame = _Frame()
+        frame.name, frame.depth, frame.index = name, len(self._stack), len(self.records)
+        self.records.append(None)
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                #Keep the parent's peak so far before the peak counter is reset for this stage
+                parent = self._stack[-1]
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+            frame.base = frame.peak = current
+        self._stack.append(frame)
+        frame.cpu = time.thread_time()
+        frame.wall = time.perf_counter()
+
+    def stop(self):
+        if not self.enabled:
+            return
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        frame = self._stack.pop()
+        peak_bytes = None
+        if self.trace_memory:
+            frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+            peak_bytes = frame.peak - frame.base
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+        self.records[frame.index] = StageRecord(frame.name, frame.depth, wall - frame.wall, cpu - frame.cpu, peak_bytes)
+
+    #Ends the run: closes any open stages, appends a JSON line to the log (if set) and returns the records
+    def finish(self, **context):
+        if not self.enabled:
+            return []
+        while self._stack:
+            self.stop()
+        if self.trace_memory:
+            self._release()
+            self.trace_memory = False
+        if self.log_path:
+            line = {
+                "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                **context,
+                "stages": [r._asdict() for r in self.records],
+            }
+            with _log_lock, open(self.log_path, "a") as f:
+                f.write(json.dumps(line, default=str) + "\n")
+        return self.records
+
+
+#Records as table rows (milliseconds / MiB), nested stages indented under their parent
+def summary_rows(records):
+    return [
+        {
+            "Stage": "  " * r.depth + r.stage,
+            "Wall (ms)": round(r.wall_s * 1000, 1),
+            "CPU (ms)": round(r.cpu_s * 1000, 1),
+            "Peak (MiB)": None if r.peak_bytes is None else round(r.peak_bytes / 2**20, 2),
+        }
+        for r in records
+    ]
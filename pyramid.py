@@ -0,0 +1,202 @@
+#Multi-resolution aggregate pyramid
+#The rows are summarised once per data version into daily, weekly, monthly, quarterly and yearly buckets, each
+#holding count, sum, sum of squares, min, max, first and last (only non-empty buckets are stored). The daily
+#level is built from the rows and every coarser level from the daily one, and the result is saved next to the
+#data cache so a restart loads it instead of rebuilding.
+#Views draw the coarsest level that still fills their pixel budget, and the count/mean/std/extremes of any date
+#range are combined from whole years, quarters and months plus the days at the edges - a few dozen buckets
+#whatever the length of the history.
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+import data_cache
+
+LEVELS = ["daily", "weekly", "monthly", "quarterly", "yearly"]
+#Levels that nest into each other, coarsest first (weeks straddle months, so they are only drawn)
+NESTED = ["yearly", "quarterly", "monthly", "daily"]
+FIELDS = ["count", "sum", "sumsq", "min", "max", "first", "last"]
+#2: built from the float64 rates (format 1 pyramids came from the float32 snapshot)
+PYRAMID_FORMAT = 2
+
+#codes: period number of each bucket (days/weeks/months/quarters/years since 1970); starts: its first day
+Level = namedtuple("Level", ["name", "codes", "starts"] + FIELDS)
+Pyramid = namedtuple("Pyramid", ["version"] + LEVELS)
+#Count, mean, std (sample), extremes and the first/last values of a date range
+RangeSummary = namedtuple("RangeSummary", ["count", "mean", "std", "min", "max", "first", "last"])
+
+
+def _day_numbers(dates):
+    return np.asarray(dates).astype("datetime64[D]").astype(np.int64)
+
+
+#Period codes of day numbers at a level (weeks start on Monday; 1970-01-01 was a Thursday)
+def period_codes(days, name):
+    days = np.asarray(days, dtype=np.int64)
+    if name == "daily":
+        return days
+    if name == "weekly":
+        return (days + 3) // 7
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if name == "monthly":
+        return months
+    if name == "quarterly":
+        return months // 3
+    return months // 12
+
+
+#First day (day number) of each period code
+def period_starts(codes, name):
+    codes = np.asarray(codes, dtype=np.int64)
+    if name == "daily":
+        return codes
+    if name == "weekly":
+        return codes * 7 - 3
+    months = {"monthly": codes, "quarterly": codes * 3, "yearly": codes * 12}[name]
+    return months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+
+#Buckets of consecutive equal codes (codes are sorted)
+def _group(name, codes, count, total, sumsq, low, high, first, last):
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(codes)])) - 1
+    level_codes = codes[starts]
+    return Level(
+        name=name,
+        codes=level_codes,
+        starts=period_starts(level_codes, name).astype("datetime64[D]"),
+        count=np.add.reduceat(count, starts),
+        sum=np.add.reduceat(total, starts),
+        sumsq=np.add.reduceat(sumsq, starts),
+        min=np.minimum.reduceat(low, starts),
+        max=np.maximum.reduceat(high, starts),
+        first=first[starts],
+        last=last[ends],
+    )
+
+
+def build(dates, rates, version=None):
+    days = _day_numbers(dates)
+    y = np.asarray(rates, dtype=np.float64)
+    if len(y) == 0:
+        raise ValueError("No observations to aggregate")
+    daily = _group("daily", days, np.ones(len(y), dtype=np.int64), y, y * y, y, y, y, y)
+    levels = {"daily": daily}
+    for name in LEVELS[1:]:
+        codes = period_codes(daily.codes, name)
+        levels[name] = _group(name, codes, *(getattr(daily, f) for f in FIELDS))
+    return Pyramid(version=version, **levels)
+
+
+#Saved with the series' data cache files
+def cache_path(path):
+    return os.path.join(data_cache.cache_paths(path)["dir"], os.path.basename(path) + ".pyramid.npz")
+
+
+def save(pyramid, file_path):
+    arrays = {"format": np.array(PYRAMID_FORMAT), "version": np.array(str(pyramid.version))}
+    for name in LEVELS:
+        level = getattr(pyramid, name)
+        arrays[f"{name}.codes"] = level.codes
+        for field in FIELDS:
+            arrays[f"{name}.{field}"] = getattr(level, field)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp = file_path + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, file_path)
+
+
+#The saved pyramid when it is for this data version, else None
+def load(file_path, version):
+    try:
+        with np.load(file_path) as f:
+            if int(f["format"]) != PYRAMID_FORMAT or str(f["version"]) != str(version):
+                return None
+            levels = {}
+            for name in LEVELS:
+                codes = f[f"{name}.codes"]
+                levels[name] = Level(name, codes, period_starts(codes, name).astype("datetime64[D]"),
+                                     *(f[f"{name}.{field}"] for field in FIELDS))
+    except (OSError, KeyError, ValueError):
+        return None
+    return Pyramid(version=version, **levels)
+
+
+def load_or_build(file_path, version, dates, rates):
+    pyramid = load(file_path, version) if file_path else None
+    if pyramid is None:
+        pyramid = build(dates, rates, version)
+        if file_path:
+            try:
+                save(pyramid, file_path)
+            except OSError:
+                pass
+    return pyramid
+
+
+#Bucket offsets [lo, hi) of a level between two dates (inclusive)
+def locate(level, start, end):
+    start, end = period_codes(_day_numbers([start, end]), level.name)
+    return int(np.searchsorted(level.codes, start)), int(np.searchsorted(level.codes, end, side="right"))
+
+
+#The coarsest level with at least `points` buckets between start and end (daily when none has)
+def choose_level(pyramid, start, end, points):
+    for name in reversed(LEVELS):
+        level = getattr(pyramid, name)
+        lo, hi = locate(level, start, end)
+        if hi - lo >= points:
+            return level, lo, hi
+    level = pyramid.daily
+    return (level,) + locate(level, start, end)
+
+
+#Bucket means of a level slice
+def means(level, lo=0, hi=None):
+    return level.sum[lo:hi] / level.count[lo:hi]
+
+
+#Level buckets covering whole periods inside [start, end] (day numbers) plus the uncovered edges for the
+#next finer level
+def _cover(pyramid, start, end, depth=0):
+    if start > end:
+        return []
+    name = NESTED[depth]
+    level = getattr(pyramid, name)
+    if name == "daily":
+        lo, hi = np.searchsorted(level.codes, [start, end + 1])
+        return [(level, lo, hi)]
+    first = period_codes([start], name)[0]
+    if period_starts([first], name)[0] < start:
+        first += 1
+    last = period_codes([end + 1], name)[0]
+    inner_start, inner_end = period_starts([first, last], name)
+    if first >= last:
+        return _cover(pyramid, start, end, depth + 1)
+    lo, hi = np.searchsorted(level.codes, [first, last])
+    return (_cover(pyramid, start, inner_start - 1, depth + 1) + [(level, lo, hi)]
+            + _cover(pyramid, inner_end, end, depth + 1))
+
+
+#Summary of the observations between start and end (inclusive dates) without touching the rows
+def summarize(pyramid, start, end):
+    start, end = _day_numbers([start, end])
+    parts = [(level, lo, hi) for level, lo, hi in _cover(pyramid, int(start), int(end)) if hi > lo]
+    if not parts:
+        return RangeSummary(0, np.nan, np.nan, np.nan, np.nan, np.nan, np.nan)
+    n = sum(int(level.count[lo:hi].sum()) for level, lo, hi in parts)
+    total = sum(float(level.sum[lo:hi].sum()) for level, lo, hi in parts)
+    sumsq = sum(float(level.sumsq[lo:hi].sum()) for level, lo, hi in parts)
+    var = (sumsq - total * total / n) / (n - 1) if n > 1 else np.nan
+    return RangeSummary(
+        count=n,
+        mean=total / n,
+        std=float(np.sqrt(max(var, 0.0))) if n > 1 else np.nan,
+        min=min(float(level.min[lo:hi].min()) for level, lo, hi in parts),
+        max=max(float(level.max[lo:hi].max()) for level, lo, hi in parts),
+        first=float(parts[0][0].first[parts[0][1]]),
+        last=float(parts[-1][0].last[parts[-1][2] - 1]),
+    )
@@ -0,0 +1,113 @@
+#Automatic regime shifts and anomaly flags for the "Annotated Events" view
+#Change points are found by binary segmentation with the squared-error (mean shift) cost: with prefix sums of
+#the rates and their squares, the cost of every candidate split of a segment is one vectorized expression,
+#and each accepted split only re-scans its two halves - O(n log n) for balanced splits. Splitting stops at
+#max_breaks or when the best gain drops under a BIC-style penalty scaled by the noise level.
+#Anomalies are the observations whose rolling z-score (rolling.compute) reaches the threshold, keeping only the
+#first of each run so one episode gives one marker.
+#Both are turned into an events.EventCatalog, so they go through the same as-of join, window statistics and
+#culled drawing as the catalog events.
+
+import heapq
+from collections import namedtuple
+
+import numpy as np
+
+import events
+
+MAX_BREAKS = 6
+#Fewest observations on either side of a change point
+MIN_SIZE = 120
+Z_WINDOW = "90"
+Z_THRESHOLD = 3.0
+#Flags closer than this many observations to the previous one belong to the same episode
+ANOMALY_GAP = 20
+
+ChangePoint = namedtuple("ChangePoint", ["index", "before_mean", "after_mean", "gain"])
+Regimes = namedtuple("Regimes", ["breaks", "anomalies", "zscores"])
+
+
+def _segment_cost(c1, c2, a, b):
+    n = b - a
+    s = c1[b] - c1[a]
+    return (c2[b] - c2[a]) - s * s / n
+
+
+#Best split point of rows [a, b) and its cost reduction, or None when the segment is too short
+def _best_split(c1, c2, a, b, min_size):
+    k = np.arange(a + min_size, b - min_size + 1)
+    if len(k) == 0:
+        return None
+    gain = _segment_cost(c1, c2, a, b) - _segment_cost(c1, c2, a, k) - _segment_cost(c1, c2, k, b)
+    j = int(gain.argmax())
+    return float(gain[j]), int(k[j])
+
+
+#Change points of the mean of y (row index where each new regime starts), in row order
+def change_points(rates, max_breaks=MAX_BREAKS, min_size=MIN_SIZE, penalty=None):
+    y = np.asarray(rates, dtype=np.float64)
+    n = len(y)
+    if n < 2 * min_size or max_breaks <= 0:
+        return []
+    shift = y.mean()
+    c1 = np.concatenate(([0.0], np.cumsum(y - shift)))
+    c2 = np.concatenate(([0.0], np.cumsum((y - shift) ** 2)))
+    if penalty is None:
+        #Noise level from the first differences (robust to the shifts themselves)
+        sigma = np.median(np.abs(np.diff(y))) / 0.6745 / np.sqrt(2)
+        penalty = 2 * max(sigma, 1e-12) ** 2 * np.log(n)
+
+    splits = []
+    heap = []
+    first = _best_split(c1, c2, 0, n, min_size)
+    if first is not None:
+        heap.append((-first[0], first[1], 0, n))
+    while heap and len(splits) < max_breaks:
+        neg_gain, k, a, b = heapq.heappop(heap)
+        if -neg_gain < penalty:
+            break
+        splits.append((k, a, b, -neg_gain))
+        for lo, hi in ((a, k), (k, b)):
+            best = _best_split(c1, c2, lo, hi, min_size)
+            if best is not None:
+                heapq.heappush(heap, (-best[0], best[1], lo, hi))
+
+    #Means of the final regimes on either side of each break
+    bounds = [0] + sorted(k for k, _, _, _ in splits) + [n]
+    means = {bounds[i]: (c1[bounds[i + 1]] - c1[bounds[i]]) / (bounds[i + 1] - bounds[i]) + shift
+             for i in range(len(bounds) - 1)}
+    gains = {k: g for k, _, _, g in splits}
+    return [
+        ChangePoint(k, float(means[bounds[i - 1]]), float(means[k]), gains[k])
+        for i, k in enumerate(bounds[1:-1], start=1)
+    ]
+
+
+#First row of each run of |z| >= threshold (runs closer than `gap` rows are merged)
+def anomalies(zscores, threshold=Z_THRESHOLD, gap=ANOMALY_GAP):
+    flagged = np.flatnonzero(np.abs(np.nan_to_num(np.asarray(zscores, dtype=np.float64))) >= threshold)
+    if len(flagged) == 0:
+        return flagged
+    keep = np.concatenate(([True], np.diff(flagged) > gap))
+    return flagged[keep]
+
+
+def detect(rates, zscores=None, max_breaks=MAX_BREAKS, min_size=MIN_SIZE, threshold=Z_THRESHOLD):
+    breaks = change_points(rates, max_breaks, min_size)
+    flags = anomalies(zscores, threshold) if zscores is not None else np.empty(0, dtype=np.int64)
+    return Regimes(breaks, flags, zscores)
+
+
+#Detected breaks ("regime") and anomalies ("anomaly") as catalog entries dated at their observation
+def as_catalog(regimes, dates):
+    dates = np.asarray(dates).astype("datetime64[ns]")
+    rows = [b.index for b in regimes.breaks] + [int(i) for i in regimes.anomalies]
+    labels = [f"Regime Shift {b.before_mean:.2f}% → {b.after_mean:.2f}%" for b in regimes.breaks]
+    labels += [f"Anomaly (z={regimes.zscores[i]:+.1f})" for i in regimes.anomalies]
+    categories = ["regime"] * len(regimes.breaks) + ["anomaly"] * len(regimes.anomalies)
+    order = np.argsort(np.asarray(rows, dtype=np.int64), kind="stable")
+    return events.EventCatalog(
+        dates=dates[np.asarray(rows, dtype=np.int64)][order],
+        labels=np.asarray(labels, dtype=object)[order],
+        categories=np.asarray(categories, dtype=object)[order],
+    )
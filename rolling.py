@@ -0,0 +1,111 @@
+#Rolling statistics over several windows at once
+#Windows are a number of observations ("90") or a calendar span ("90D", the observations of the last 90
+#days, like pandas rolling("90D")). The mean and std of every window come from analytics.window_moments, one
+#set of prefix sums shared by all windows, so each extra window is just a few array subtractions. Min/max use
+#the van Herk/Gil-Werman block scans for observation-count windows and a sparse table for calendar windows,
+#whose width varies.
+#Windows that are not full yet use the observations available, like analytics.rolling_moments (std needs 2),
+#so the "90" window matches the Analytics rolling_mean/volatility.
+
+from collections import namedtuple
+
+import numpy as np
+
+import analytics
+
+WINDOWS = ["20", "90", "252", "90D"]
+DEFAULT_WINDOW = "90"
+
+RollingStats = namedtuple("RollingStats", ["window", "mean", "std", "min", "max", "zscore"])
+
+
+#(observations, days) of a window spec - one of them is None
+def parse_window(spec):
+    spec = str(spec).strip().upper()
+    if spec.endswith("D"):
+        return None, int(spec[:-1])
+    return int(spec), None
+
+
+def label(spec):
+    count, days = parse_window(spec)
+    return f"{days}-Day" if days else f"{count}-Obs"
+
+
+#First row of each row's window
+def window_starts(dates, spec):
+    count, days = parse_window(spec)
+    if count is not None:
+        return np.maximum(np.arange(len(dates)) + 1 - count, 0)
+    t = np.asarray(dates).astype("datetime64[ns]")
+    return np.searchsorted(t, t - np.timedelta64(days, "D"), side="right")
+
+
+#First row of the window ending at `row` (only reads the rows up to it)
+def window_start(dates, spec, row):
+    count, days = parse_window(spec)
+    if count is not None:
+        return max(row + 1 - count, 0)
+    t = np.asarray(dates[:row + 1]).astype("datetime64[ns]", copy=False)
+    return int(np.searchsorted(t, t[row] - np.timedelta64(days, "D"), side="right"))
+
+
+#Max over y[i-w+1 .. i] (clipped at 0) for every i, in O(n) whatever w
+def _van_herk_max(y, w):
+    n = len(y)
+    if w <= 1:
+        return y.copy()
+    padded = np.full(w - 1 + n, -np.inf)
+    padded[w - 1:] = y
+    n_blocks = -(-len(padded) // w)
+    blocks = np.full(n_blocks * w, -np.inf)
+    blocks[:len(padded)] = padded
+    blocks = blocks.reshape(n_blocks, w)
+    g = np.maximum.accumulate(blocks, axis=1).ravel()
+    h = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    i = np.arange(w - 1, w - 1 + n)
+    return np.maximum(h[i - w + 1], g[i])
+
+
+#Max over y[starts[i] .. i] for arbitrary (non-decreasing) starts, from a sparse table
+def _range_max(y, starts):
+    n = len(y)
+    ends = np.arange(n)
+    width = ends - starts + 1
+    k = np.floor(np.log2(np.maximum(width, 1))).astype(np.int64)
+    result = np.empty(n)
+    level = y.copy()
+    for j in range(int(k.max()) + 1 if n else 0):
+        mask = k == j
+        if mask.any():
+            result[mask] = np.maximum(level[starts[mask]], level[ends[mask] - (1 << j) + 1])
+        span = 1 << j
+        level = np.maximum(level[:-span], level[span:]) if len(level) > span else level[:0]
+        level = np.concatenate((level, np.full(n - len(level), -np.inf)))
+    return result
+
+
+def _extreme(y, spec, starts, sign):
+    count, _ = parse_window(spec)
+    values = sign * y
+    out = _van_herk_max(values, count) if count is not None else _range_max(values, starts)
+    return sign * out
+
+
+#Mean, std, min, max and z-score of every window; {spec: RollingStats} with float32 arrays
+def compute(dates, rates, windows=WINDOWS):
+    y = np.asarray(rates, dtype=np.float64)
+    starts = [window_starts(dates, spec) for spec in windows]
+    results = {}
+    for spec, start, (mean, std) in zip(windows, starts, analytics.window_moments(y, starts)):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            zscore = np.where(std > 0, (y - mean) / std, np.nan)
+        results[spec] = RollingStats(
+            window=spec,
+            mean=mean.astype(np.float32),
+            std=std.astype(np.float32),
+            min=_extreme(y, spec, start, -1).astype(np.float32),
+            max=_extreme(y, spec, start, 1).astype(np.float32),
+            zscore=zscore.astype(np.float32),
+        )
+    return results
@@ -0,0 +1,101 @@
+#Startup-time report
+#Measures cold start of the report pack (the module the frozen executable runs) in fresh interpreters, so regressions in import cost show up before they reach the kiosks:
+#  - `python -X importtime` on the entry module, listing the slowest modules it imports directly
+#  - the time until the first figure has been drawn and saved headlessly, and which heavy modules it loaded
+#
+#  python startup_report.py [--top 15] [--json startup.json] [--budget 3.0]
+#--budget makes the script exit with status 1 when the first figure takes longer than that many seconds.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODULE = "economic_trends_viz"
+HEAVY_MODULES = ["streamlit", "matplotlib.pyplot", "seaborn", "scipy", "pandas"]
+
+#Loads the data and saves the first visualization to memory, then reports the timing and loaded heavy modules
+FIRST_FIGURE = """
+import io, json, sys, time
+start = time.perf_counter()
+import {module} as app
+imported = time.perf_counter()
+data = app.load_series(app.data_path)
+loaded = time.perf_counter()
+fig = app.VISUALIZATIONS[0][2](data)
+fig.savefig(io.BytesIO(), format="png")
+drawn = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start, "load_s": loaded - imported, "draw_s": drawn - loaded, "total_s": drawn - start,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _run(args):
+    env = dict(os.environ, MPLBACKEND="Agg")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable] + args, cwd=HERE, env=env, capture_output=True, text=True, check=True)
+    return proc, time.perf_counter() - start
+
+
+#Parses `-X importtime` output: the entry module's total import time and its direct imports as
+#[(module, cumulative seconds)], slowest first
+def import_times(module):
+    proc, wall = _run(["-X", "importtime", "-c", f"import {module}"])
+    total, rows = 0.0, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        #Each level of nesting is indented two more spaces under the module that triggered it
+        depth = (len(name) - len(name.lstrip())) // 2
+        seconds = int(cumulative) / 1e6
+        if depth == 0 and name.strip() == module:
+            total = seconds
+        elif depth == 1:
+            rows.append((name.strip(), seconds))
+    return total, sorted(rows, key=lambda r: r[1], reverse=True), wall
+
+
+def first_figure(module):
+    proc, wall = _run(["-c", FIRST_FIGURE.format(module=module, heavy=HEAVY_MODULES)])
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_s"] = wall
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report cold-start import and first-figure times.")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    parser.add_argument("--budget", type=float, help="fail when the first figure takes longer (seconds)")
+    args = parser.parse_args(argv)
+
+    import_total, imports, import_wall = import_times(MODULE)
+    figure = first_figure(MODULE)
+
+    print(f"Import of {MODULE}: {import_total:.3f}s ({import_wall:.3f}s including interpreter start)")
+    for name, seconds in imports[:args.top]:
+        print(f"  {seconds:8.3f}s  {name}")
+    print(f"First figure: {figure['total_s']:.3f}s (import {figure['import_s']:.3f}s, "
+          f"load {figure['load_s']:.3f}s, draw {figure['draw_s']:.3f}s)")
+    print(f"Heavy modules loaded: {', '.join(figure['heavy_modules']) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"module": MODULE, "import_s": import_total, "import_process_s": import_wall,
+                       "imports": imports[:args.top],
+                       "first_figure": figure}, f, indent=2)
+
+    if args.budget is not None and figure["total_s"] > args.budget:
+        print(f"First figure over budget ({figure['total_s']:.3f}s > {args.budget:.3f}s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
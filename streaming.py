@@ -0,0 +1,126 @@
+#Streaming (out-of-core) ingestion for series files that do not fit in memory
+#The CSV is read in bounded chunks and folded into small running aggregates:
+#per-day sums/counts (which give the yearly means, the Year x Month matrix and a daily series),
+#the extremes, and a fine-grained histogram that is rebinned at the end.
+#Memory depends on the number of days and the rate range, not on the number of rows.
+
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 500_000
+HIST_BIN_WIDTH = 0.001
+#Files above this size are streamed instead of loaded whole
+STREAMING_THRESHOLD_BYTES = 512 * 1024 * 1024
+
+StreamAggregates = namedtuple("StreamAggregates", [
+    "rows", "daily", "annual_avg", "monthly_avg",
+    "highest", "lowest", "hist_counts", "hist_edges",
+])
+
+
+def should_stream(path, threshold=STREAMING_THRESHOLD_BYTES):
+    if os.environ.get("T10YIE_STREAMING") == "1":
+        return True
+    return os.path.getsize(path) > threshold
+
+
+def _clean_chunk(chunk):
+    chunk.columns = ["Date", "Rate"]
+    chunk["Date"] = pd.to_datetime(chunk["Date"], errors="coerce")
+    chunk["Rate"] = pd.to_numeric(chunk["Rate"], errors="coerce")
+    chunk.dropna(inplace=True)
+    chunk.drop_duplicates(inplace=True)
+    return chunk
+
+
+def _add(total, part):
+    if total is None:
+        return part
+    return total.add(part, fill_value=0)
+
+
+def _rebin(fine_counts, low, high, bins):
+    #Fold the fine histogram into `bins` equal-width bins over [low, high], like np.histogram
+    edges = np.linspace(low, high, bins + 1)
+    if len(fine_counts) == 0:
+        return np.zeros(bins, dtype=np.int64), edges
+    centers = (fine_counts.index.to_numpy() + 0.5) * HIST_BIN_WIDTH
+    target = np.clip(np.searchsorted(edges, centers, side="right") - 1, 0, bins - 1)
+    counts = np.bincount(target, weights=fine_counts.to_numpy(), minlength=bins)
+    return counts.astype(np.int64), edges
+
+
+#Reads the file chunk by chunk and returns the aggregates the views need
+#Duplicates are dropped within each chunk and against the tail of the previous chunk,
+#which covers the usual case of a date-sorted export without keeping every row around
+def stream_aggregates(path, chunksize=DEFAULT_CHUNKSIZE, bins=30):
+    day_sum = day_count = fine_hist = None
+    rows = 0
+    highest = lowest = None
+    prev_tail = None
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        chunk = _clean_chunk(chunk)
+        if prev_tail is not None and len(chunk):
+            seen = chunk.merge(prev_tail, how="left", indicator=True)["_merge"].to_numpy() == "both"
+            chunk = chunk[~seen]
+        if not len(chunk):
+            continue
+        last_date = chunk["Date"].max()
+        prev_tail = chunk.loc[chunk["Date"] == last_date, ["Date", "Rate"]]
+        rows += len(chunk)
+
+        dates = chunk["Date"].to_numpy()
+        rates = chunk["Rate"].to_numpy(dtype=np.float64)
+
+        #Per-day sums and counts
+        days = dates.astype("datetime64[D]")
+        grouped = pd.Series(rates).groupby(days)
+        day_sum = _add(day_sum, grouped.sum())
+        day_count = _add(day_count, grouped.count())
+
+        #Extremes (first occurrence wins, like idxmax/idxmin)
+        i_max, i_min = int(rates.argmax()), int(rates.argmin())
+        if highest is None or rates[i_max] > highest[0]:
+            highest = (float(rates[i_max]), pd.Timestamp(dates[i_max]))
+        if lowest is None or rates[i_min] < lowest[0]:
+            lowest = (float(rates[i_min]), pd.Timestamp(dates[i_min]))
+
+        #Fine histogram keyed by bin number
+        fine = np.floor(rates / HIST_BIN_WIDTH).astype(np.int64)
+        keys, counts = np.unique(fine, return_counts=True)
+        fine_hist = _add(fine_hist, pd.Series(counts, index=keys))
+
+    if rows == 0:
+        raise ValueError(f"No valid observations in {path}")
+
+    day_sum = day_sum.sort_index()
+    day_count = day_count.reindex(day_sum.index)
+    index = pd.DatetimeIndex(day_sum.index)
+
+    daily = pd.DataFrame({"Date": index, "Rate": (day_sum / day_count).to_numpy()})
+
+    #Yearly and monthly means weight every raw observation equally, same as the in-memory groupby
+    year = index.year
+    month = index.month
+    annual = day_sum.groupby(year).sum() / day_count.groupby(year).sum()
+    annual_avg = pd.DataFrame({"Year": annual.index.to_numpy(), "Rate": annual.to_numpy()})
+    monthly = day_sum.groupby([year, month]).sum() / day_count.groupby([year, month]).sum()
+    monthly.index.names = ["Year", "Month"]
+    monthly_avg = monthly.unstack()
+
+    hist_counts, hist_edges = _rebin(fine_hist.sort_index(), lowest[0], highest[0], bins)
+
+    return StreamAggregates(
+        rows=rows,
+        daily=daily,
+        annual_avg=annual_avg,
+        monthly_avg=monthly_avg,
+        highest=highest,
+        lowest=lowest,
+        hist_counts=hist_counts,
+        hist_edges=hist_edges,
+    )
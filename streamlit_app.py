@@ -1,36 +1,91 @@
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import matplotlib
 import numpy as np
-from datetime import datetime
 import streamlit as st
+import client_charts
+import data_cache
+import dataset
+import multi_series
+import distributions
+import events
+import exports
+import fred_refresh
+import heatmaps
+import downsample
+from figure_cache import FigureCache, figure_bytes
+import lazy_imports
+import profiling
+import regimes
+import rolling
+import pyramid
+import trends
+import zoom
+
+# Headless server: pin the non-interactive backend. pyplot and seaborn are only imported
+# when a figure actually has to be drawn (not for cached views)
+matplotlib.use("Agg")
+plt = lazy_imports.lazy_module("matplotlib.pyplot")
+sns = lazy_imports.lazy_module("seaborn")
 
 st.set_page_config(page_title="Economic Trend Visualizer", layout="wide")
 st.title("Economic Trend Visualizer — 10-Year Inflation Expectation (T10YIE)")
 
 # Load data
 data_path = os.path.join(os.path.dirname(__file__), 'T10YIE.csv')
-@st.cache_data
+# Other FRED series CSVs in this folder (or T10YIE_DATA_DIR) can be picked in the sidebar
+data_dir = os.environ.get("T10YIE_DATA_DIR", os.path.dirname(os.path.abspath(__file__)))
+@st.cache_resource
+def dataset_store(path):
+    # Shared by every session; only rows appended since the last refresh get processed
+    return dataset.DatasetStore(pyramid_path=pyramid.cache_path(path))
+
 def load_data(path):
-    df = pd.read_csv(path)
-    df.columns = ["Date", "Rate"]
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df["Rate"] = pd.to_numeric(df["Rate"], errors="coerce")
-    df.drop_duplicates(inplace=True)
-    df.dropna(inplace=True)
-    df.sort_values(by="Date", inplace=True)
-    df.reset_index(drop=True, inplace=True)
-    return df
+    # Cleaned series comes from the on-disk cache, so restarts skip CSV parsing
+    # and a file that only grew has just its new tail parsed.
+    # Returns the shared read-only dataset for this data version: compact analytics (rolling,
+    # yearly/monthly, extremes, regression) plus the zoom index and distribution summaries built from it
+    with profiler.stage("load_data"):
+        series = data_cache.load_clean_series(path)
+    with profiler.stage("derived data"):
+        return dataset_store(path).get(series)
+
+# Sidebar
+st.sidebar.header("Controls")
+series_paths = multi_series.discover_series(data_dir) or [data_path]
+series_names = [multi_series.series_name(p) for p in series_paths]
+series_path = series_paths[0]
+if len(series_paths) > 1:
+    series_path = st.sidebar.selectbox("Series", series_paths,
+                                       index=series_names.index("T10YIE") if "T10YIE" in series_names else 0,
+                                       format_func=multi_series.series_name)
+series = multi_series.series_name(series_path)
+
+# Fetches only the observations newer than each CSV's last row (conditional requests, atomic appends);
+# the cache then parses just the appended tail. T10YIE_FRED_URL points it at another endpoint (fred_server.py)
+if st.sidebar.button("Refresh data from FRED"):
+    with st.spinner("Checking FRED for new observations..."):
+        results = fred_refresh.refresh(series_paths)
+    for path, result in zip(series_paths, results):
+        if isinstance(result, Exception):
+            st.sidebar.warning(f"{multi_series.series_name(path)}: refresh failed ({result})")
+        elif result.rows_added:
+            st.sidebar.success(f"{result.series}: {result.rows_added} new rows through {result.last_date}")
+        else:
+            st.sidebar.info(f"{result.series}: up to date")
+
+# Per-stage timing (T10YIE_PROFILE=1 turns it on by default, T10YIE_PROFILE_LOG=file.jsonl also logs every run)
+profile = st.sidebar.checkbox("Profile stages", value=os.environ.get("T10YIE_PROFILE") == "1")
+trace_memory = profile and st.sidebar.checkbox("Track peak memory (slower)", value=False)
+profiler = profiling.Profiler(profile, trace_memory, os.environ.get("T10YIE_PROFILE_LOG"))
 
 try:
-    df = load_data(data_path)
+    data = load_data(series_path)
 except FileNotFoundError:
-    st.error(f"Data file not found at {data_path}. Please add `T10YIE.csv` to the project folder.")
+    st.error(f"Data file not found at {series_path}. Please add `T10YIE.csv` to the project folder.")
     st.stop()
+data_version = data.version
 
-# Sidebar
-st.sidebar.header("Controls")
 viz = st.sidebar.selectbox("Select visualization", [
     "Line: T10YIE Over Time",
     "Rolling Mean (90d) vs Daily",
@@ -43,24 +98,175 @@ viz = st.sidebar.selectbox("Select visualization", [
     "Volatility (Std Dev)",
     "Linear Regression Trend"
 ])
+# Long series are reduced to ~2 points per pixel before plotting; stats below always use every row
+decimate = st.sidebar.checkbox("Downsample long series", value=True)
+# Time-series, bar and heatmap views can also be drawn in the browser (Vega-Lite): the server only sends a
+# compact table, and hover/zoom/pan need no rerun
+CLIENT_VIEWS = ["Line: T10YIE Over Time", "Rolling Mean (90d) vs Daily", "Annual Average Bar",
+                "Heatmap (Monthly Averages)", "Volatility (Std Dev)"]
+client_side = viz in CLIENT_VIEWS and st.sidebar.radio(
+    "Rendering", ["Server (image)", "Browser (interactive)"], horizontal=True) == "Browser (interactive)"
+
+# Date range zoom: resolved to row offsets on the dataset's sorted index, so the views get slices
+# of the full arrays and the range's yearly/monthly means, extremes and regression come from prefix sums
+first_day, last_day = pd.Timestamp(data.stats.dates[0]).date(), pd.Timestamp(data.stats.dates[-1]).date()
+date_range = (first_day, last_day)
+if first_day < last_day:
+    date_range = st.sidebar.slider("Date range", min_value=first_day, max_value=last_day,
+                                   value=(first_day, last_day), format="YYYY-MM-DD")
+with profiler.stage("zoom"):
+    lo, hi = zoom.locate(data.index(), *date_range)
+    if lo < hi:
+        stats = data.window(lo, hi)
+if lo >= hi:
+    st.warning("No observations in the selected date range.")
+    st.stop()
+
+# Events view: observations before/after each event used for its change and volatility, and the markers
+# found in the data (change points, rolling z-score anomalies; detected once per version and setting)
+event_window = events.EVENT_WINDOW
+max_breaks, z_threshold = 0, None
+if viz == "Annotated Events":
+    event_window = int(st.sidebar.number_input("Event window (observations)", min_value=2, max_value=260,
+                                               value=events.EVENT_WINDOW, step=1))
+    if st.sidebar.checkbox("Mark detected regime shifts", value=True):
+        max_breaks = st.sidebar.slider("Regime shifts", 1, 12, regimes.MAX_BREAKS)
+    if st.sidebar.checkbox("Mark rolling z-score anomalies", value=False):
+        z_threshold = st.sidebar.slider("Anomaly |z| threshold", 2.0, 5.0, regimes.Z_THRESHOLD, 0.5)
+event_params = (event_window, max_breaks, z_threshold)
+# The events figure is also keyed by the catalog file, so editing events.csv redraws it
+events_stamp = events.catalog_stamp() if viz == "Annotated Events" else None
+
+# Rolling views: windows to draw, all precomputed together per data version (so switching is only a lookup)
+rolling_windows = (rolling.DEFAULT_WINDOW,)
+if viz in ("Rolling Mean (90d) vs Daily", "Volatility (Std Dev)"):
+    rolling_windows = tuple(st.sidebar.multiselect("Rolling windows", rolling.WINDOWS, default=[rolling.DEFAULT_WINDOW],
+                                                   format_func=rolling.label)) or rolling_windows
+ROLLING_COLORS = ["purple", "darkorange", "teal", "crimson"]
+ROLLING_TITLE = ("10-Year Inflation Expectation: Daily vs "
+                 + " / ".join(rolling.label(w) for w in rolling_windows) + " Average")
+
+# Regression view: rows per window of the rolling slope
+trend_window = 252
+if viz == "Linear Regression Trend":
+    trend_window = st.sidebar.selectbox("Rolling trend window (observations)", [20, 90, 252, 504, 1260], index=2)
+
+# Heatmap view: cell layout; the Series layouts compare every series found in the data folder
+HEATMAP_LAYOUTS = ["Year × Month", "Year × Day of Year"]
+if len(series_paths) > 1:
+    HEATMAP_LAYOUTS += ["Series × Year", "Series × Quarter", "Series × Month"]
+heatmap_layout = HEATMAP_LAYOUTS[0]
+if viz == "Heatmap (Monthly Averages)":
+    heatmap_layout = st.sidebar.selectbox("Heatmap layout", HEATMAP_LAYOUTS)
+# The Series layouts read every series file, so their figures are also keyed by each file's mtime and size
+series_stamps = None
+if viz == "Heatmap (Monthly Averages)" and heatmap_layout.startswith("Series"):
+    series_stamps = tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in series_paths)
+
+# Rendered figures are shared by all sessions, keyed by view, its parameters and the data version
+@st.cache_resource
+def figure_cache():
+    return FigureCache()
+
+fig_cache = figure_cache()
+view_params = (series, decimate, date_range, event_params, events_stamp, trend_window, rolling_windows,
+               heatmap_layout, series_stamps)
+cache_key = (viz, view_params, data_version)
 
 # Common helper to render matplotlib figure in Streamlit
 def render_fig(fig):
-    st.pyplot(fig)
+    with profiler.stage("render"):
+        png = figure_bytes(fig)
     plt.close(fig)
+    fig_cache.put(cache_key, png)
+    st.image(png)
+
+# Derived values all come from the analytics result
+annual_avg = stats.annual_avg
+range_bounds = (np.datetime64(date_range[0]), np.datetime64(date_range[1]))
+
+# Events from the catalog (events.csv or T10YIE_EVENTS), joined to the full series in one pass;
+# the view opens on 2020-2022 and follows the date range once it is narrowed
+if viz == "Annotated Events":
+    with profiler.stage("events"):
+        catalog = events.load_catalog()
+        if max_breaks or z_threshold is not None:
+            found = data.regimes(max_breaks, z_threshold=z_threshold or regimes.Z_THRESHOLD)
+            if z_threshold is None:
+                found = found._replace(anomalies=found.anomalies[:0])
+            catalog = events.merge(catalog, regimes.as_catalog(found, data.stats.dates))
+        index = data.index()
+        annotated = events.annotate(catalog, data.stats.dates, data.stats.rates, event_window,
+                                    sums=(index.sum_y, index.sum_yy))
+    events_start, events_end = range_bounds
+    if date_range == (first_day, last_day):
+        events_start, events_end = np.datetime64("2020-01-01"), np.datetime64("2022-12-31")
+
+# Aligned matrix of all series for the Series heatmaps, rebuilt when one of the files changes
+@st.cache_resource(max_entries=1)
+def series_matrix(paths, stamps):
+    return multi_series.load_series_matrix(list(paths))
 
-# Prepare some derived columns
-df = df.sort_values("Date").reset_index(drop=True)
-df["Year"] = df["Date"].dt.year
+# Cell matrix of the heatmap layout over the selected range, binned with bincount (no groupby/unstack)
+def heatmap_grid(layout):
+    if layout == "Year × Day of Year":
+        return heatmaps.year_day(stats.dates, stats.rates)
+    if layout.startswith("Series"):
+        period = {"Year": "Y", "Quarter": "Q", "Month": "M"}[layout.split(" × ")[1]]
+        return heatmaps.series_period(series_matrix(tuple(series_paths), series_stamps), period, *range_bounds)
+    return heatmaps.year_month(stats.monthly_avg)
 
-df["Rolling_Mean_90"] = df["Rate"].rolling(window=90, min_periods=1).mean()
+HEATMAP_TITLE = ("Heatmap of Monthly Average Inflation Rates" if heatmap_layout == HEATMAP_LAYOUTS[0]
+                 else f"Heatmap of Average Rates ({heatmap_layout})")
 
-annual_avg = df.groupby("Year")["Rate"].mean().reset_index()
+# Compact payload and Vega-Lite spec of a browser-rendered view
+def client_chart(viz):
+    if viz == "Line: T10YIE Over Time":
+        payload = client_charts.rate_payload(stats, data.pyramid(), *range_bounds)
+        return payload, client_charts.line_spec(payload, "10-Year Inflation Expectation Rate Over Time",
+                                                "Inflation Expectation Rate (%)")
+    if viz == "Rolling Mean (90d) vs Daily":
+        columns = {"Daily Rate": stats.rates}
+        columns.update({f"{rolling.label(w)} Average": data.rolling()[w].mean[lo:hi] for w in rolling_windows})
+        payload = client_charts.series_payload(stats.dates, columns)
+        return payload, client_charts.multi_line_spec(payload, ROLLING_TITLE,
+                                                      "Inflation Expectation Rate (%)",
+                                                      ["lightgray"] + ROLLING_COLORS[:len(rolling_windows)])
+    if viz == "Volatility (Std Dev)":
+        payload = client_charts.series_payload(stats.dates, {f"{rolling.label(w)} Std Dev": data.rolling()[w].std[lo:hi]
+                                                             for w in rolling_windows})
+        return payload, client_charts.multi_line_spec(payload, "Volatility in Inflation Expectations",
+                                                      "Standard Deviation - Volatility (%)",
+                                                      (["plum"] + ROLLING_COLORS[1:])[:len(rolling_windows)])
+    if viz == "Annual Average Bar":
+        return client_charts.annual_payload(annual_avg), client_charts.bar_spec("Average Inflation Expectation Rate by Year")
+    grid = heatmap_grid(heatmap_layout)
+    return client_charts.grid_payload(grid), client_charts.heatmap_spec(HEATMAP_TITLE, grid)
 
 # Visualizations
-if viz == "Line: T10YIE Over Time":
+profiler.start(f"view: {viz}")
+cached_png = None if client_side else fig_cache.get(cache_key)
+if client_side:
+    with profiler.stage("payload"):
+        payload, spec = client_chart(viz)
+    st.vega_lite_chart(payload, spec)
+
+elif cached_png is not None:
+    st.image(cached_png)
+
+elif viz == "Line: T10YIE Over Time":
     fig, ax = plt.subplots(figsize=(12,6))
-    ax.plot(df["Date"], df["Rate"], color="navy", linewidth=1)
+    n_points = downsample.target_points(fig)
+    # Drawn from the coarsest pyramid level that still fills the width, so the cost does not grow with the rows
+    # (days holding several observations show their min-max range); one observation per day is drawn as before
+    level, b_lo, b_hi = pyramid.choose_level(data.pyramid(), *range_bounds, n_points)
+    if not decimate or (level.name == "daily" and b_hi - b_lo == len(stats.rates)):
+        x, y = downsample.thin(stats.dates, stats.rates, n_points, enabled=decimate)
+    else:
+        x, y = downsample.thin(level.starts[b_lo:b_hi], pyramid.means(level, b_lo, b_hi), n_points)
+        ax.fill_between(level.starts[b_lo:b_hi], level.min[b_lo:b_hi], level.max[b_lo:b_hi],
+                        color="navy", alpha=0.15, linewidth=0)
+    ax.plot(x, y, color="navy", linewidth=1)
     ax.set_title("10-Year Inflation Expectation Rate Over Time")
     ax.set_xlabel("Year")
     ax.set_ylabel("Inflation Expectation Rate (%)")
@@ -69,9 +275,13 @@ if viz == "Line: T10YIE Over Time":
 
 elif viz == "Rolling Mean (90d) vs Daily":
     fig, ax = plt.subplots(figsize=(12,6))
-    ax.plot(df["Date"], df["Rate"], label="Daily Rate", color="lightgray", alpha=0.5)
-    ax.plot(df["Date"], df["Rolling_Mean_90"], label="90-Day Average", color="purple", linewidth=2)
-    ax.set_title("10-Year Inflation Expectation: Daily vs 90 Day Average")
+    n_points = downsample.target_points(fig)
+    x, y = downsample.thin(stats.dates, stats.rates, n_points, enabled=decimate)
+    ax.plot(x, y, label="Daily Rate", color="lightgray", alpha=0.5)
+    for spec, color in zip(rolling_windows, ROLLING_COLORS):
+        x, y = downsample.thin(stats.dates, data.rolling()[spec].mean[lo:hi], n_points, enabled=decimate)
+        ax.plot(x, y, label=f"{rolling.label(spec)} Average", color=color, linewidth=2)
+    ax.set_title(ROLLING_TITLE)
     ax.set_xlabel("Year")
     ax.set_ylabel("Inflation Expectation Rate (%)")
     ax.legend()
@@ -86,51 +296,54 @@ elif viz == "Annual Average Bar":
     render_fig(fig)
 
 elif viz == "Boxplot by Year":
+    summary = data.summary(lo, hi)
     fig, ax = plt.subplots(figsize=(12,6))
-    sns.boxplot(x="Year", y="Rate", data=df, palette="cool", showfliers=False, ax=ax)
+    distributions.draw_boxes(ax, summary, distributions.palette(plt.get_cmap("cool"), len(summary.years)))
     ax.set_title("Distribution of Inflation Expectation Rate by Year")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Rate")
     ax.set_xticklabels(ax.get_xticklabels(), rotation=45)
     render_fig(fig)
 
 elif viz == "Heatmap (Monthly Averages)":
-    df["Month"] = df["Date"].dt.month
-    monthly_avg = df.groupby(["Year", "Month"])["Rate"].mean().unstack()
+    with profiler.stage("bin"):
+        grid = heatmap_grid(heatmap_layout)
     fig, ax = plt.subplots(figsize=(12,6))
-    sns.heatmap(monthly_avg, cmap="YlGnBu", annot=True, fmt=".2f", ax=ax)
-    ax.set_title("Heatmap of Monthly Average Inflation Rates")
+    heatmaps.draw(ax, grid)
+    ax.set_title(HEATMAP_TITLE)
     render_fig(fig)
 
 elif viz == "Histogram (Rate Distribution)":
     fig, ax = plt.subplots(figsize=(10,6))
-    sns.histplot(df["Rate"], bins=30, kde=True, color="teal", ax=ax)
+    distributions.draw_histogram(ax, data.summary(lo, hi), "teal")
     ax.set_title("Distribution of Inflation Expectation Rates")
     render_fig(fig)
 
 elif viz == "Violin Plot by Year":
+    summary = data.summary(lo, hi)
     fig, ax = plt.subplots(figsize=(12,6))
-    sns.violinplot(x="Year", y="Rate", data=df, palette="viridis", inner="quartile", linewidth=1.5, ax=ax)
+    distributions.draw_violins(ax, summary, distributions.palette(plt.get_cmap("viridis"), len(summary.years)))
     ax.set_title("Violin Plot of Inflation Expectation by Year")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Rate")
     ax.set_xticklabels(ax.get_xticklabels(), rotation=45)
     render_fig(fig)
 
 elif viz == "Annotated Events":
     fig, ax = plt.subplots(figsize=(12,6))
-    ax.plot(df["Date"], df["Rate"], color="steelblue", label="T10YIE Rate", linewidth=1)
-    ax.fill_between(df["Date"], df["Rate"], color="lightblue", alpha=0.5)
-
-    events = {
-        datetime(2020, 3, 11): "COVID-19 Pandemic Declared",
-        datetime(2022, 2, 24): "Russia-Ukraine Conflict",
-        datetime(2022, 3, 15): "Fed Rate Hike",
-        datetime(2022, 6, 1): "US Inflation Peaks"
-    }
-
-    for date, label in events.items():
-        color = "red" if "COVID" in label else "orange" if "Conflict" in label else "green" if "Hike" in label else "purple"
-        ax.axvline(date, color=color, label=label, linestyle="--", alpha=0.7)
-        ax.text(date, df["Rate"].max()*0.5, label, rotation=90, color=color, fontsize=10, va="center")
-
-    ax.set_xlim(datetime(2020,1,1), datetime(2022,12,31))
+    # Only the visible window (plus one point either side) is decimated and drawn
+    full = data.stats
+    v_lo, v_hi = np.searchsorted(full.dates, [events_start, events_end + np.timedelta64(1, "D")])
+    visible = slice(max(v_lo - 1, 0), v_hi + 1)
+    x, y = downsample.thin(full.dates[visible], full.rates[visible],
+                           downsample.target_points(fig), method="minmax", enabled=decimate)
+    ax.plot(x, y, color="steelblue", label="T10YIE Rate", linewidth=1)
+    ax.fill_between(x, y, color="lightblue", alpha=0.5)
+
+    # Annotations are culled to the visible range, with a capped number of text labels
+    events.draw(ax, annotated, events_start, events_end, stats.highest.rate*0.5)
+
+    ax.set_xlim(events_start, events_end)
     ax.set_title("Inflation Expectation Over Time with Annotated Major Events")
     ax.set_xlabel("Year")
     ax.set_ylabel("Inflation Expectation (%)")
@@ -139,9 +352,16 @@ elif viz == "Annotated Events":
 
 elif viz == "Volatility (Std Dev)":
     fig, ax = plt.subplots(figsize=(12,6))
-    df["Volatility"] = df["Rate"].rolling(window=90, min_periods=1).std()
-    ax.plot(df["Date"], df["Volatility"], color="lavender", linewidth=1.5)
-    ax.fill_between(df["Date"], df["Volatility"], color="plum", alpha=0.5)
+    n_points = downsample.target_points(fig)
+    for i, spec in enumerate(rolling_windows):
+        x, y = downsample.thin(stats.dates, data.rolling()[spec].std[lo:hi], n_points, method="minmax", enabled=decimate)
+        if i == 0:
+            ax.plot(x, y, color="lavender", linewidth=1.5, label=f"{rolling.label(spec)} Std Dev")
+            ax.fill_between(x, y, color="plum", alpha=0.5)
+        else:
+            ax.plot(x, y, linewidth=1.5, label=f"{rolling.label(spec)} Std Dev")
+    if len(rolling_windows) > 1:
+        ax.legend()
     ax.set_title("Volatility in Inflation Expectations")
     ax.set_xlabel("Year")
     ax.set_ylabel("Standard Deviation - Volatility (%)")
@@ -149,36 +369,92 @@ elif viz == "Volatility (Std Dev)":
     render_fig(fig)
 
 elif viz == "Linear Regression Trend":
-    df["Date_Num"] = (df["Date"] - df["Date"].min()).dt.days
-    x = df["Date_Num"].values
-    y = df["Rate"].values
-    coeffs = np.polyfit(x, y, 1)
-    slope, intercept = coeffs
-    y_pred = slope * x + intercept
+    x = stats.days
+    y = stats.rates
+    slope, intercept = stats.regression.slope, stats.regression.intercept
+    trend = trends.from_regression(stats.regression)
 
-    fig, ax = plt.subplots(figsize=(12,6))
-    ax.scatter(x, y, s=10, label = "Rates", color="steelblue", alpha=0.6)
-    ax.plot(x, y_pred, color="red", linewidth=2, label=f"Trend Line: y={slope:.5f}x + {intercept:.2f}")
+    fig, (ax, ax_slope) = plt.subplots(2, 1, figsize=(12,9), gridspec_kw={"height_ratios": [2, 1]})
+    # The fit uses every point; only the scatter is thinned, and the line and its bands need just a few points
+    n_points = downsample.target_points(fig)
+    x_plot, y_plot = downsample.thin(x, y, n_points, method="minmax", enabled=decimate)
+    ax.scatter(x_plot, y_plot, s=10, label = "Rates", color="steelblue", alpha=0.6)
+    x_line = np.linspace(x[0], x[-1], 50)
+    y_line, lower, upper = trends.band(trend, x_line)
+    ax.plot(x_line, y_line, color="red", linewidth=2, label=f"Trend Line: y={slope:.5f}x + {intercept:.2f} (R²={trend.r2:.2f})")
+    ax.fill_between(x_line, lower, upper, color="red", alpha=0.2, label=f"{trends.CONFIDENCE:.0%} confidence band")
+    x_ahead, y_ahead, lower, upper = trends.forecast(trend, x[-1])
+    ax.plot(x_ahead, y_ahead, color="red", linestyle="--", linewidth=1.5)
+    ax.fill_between(x_ahead, lower, upper, color="orange", alpha=0.25, label=f"{trends.FORECAST_DAYS}-day forecast band")
     ax.set_title("Scatter Plot with Linear Regression Trend Line")
-    ax.set_xlabel("Days Since {}".format(df["Date"].min().date()))
+    ax.set_xlabel("Days Since {}".format(pd.Timestamp(stats.dates[0]).date()))
     ax.set_ylabel("Inflation Expectation Rate (%)")
     ax.legend()
     ax.grid(True, linestyle='--', alpha=0.6)
+
+    # Slope over time: every rolling and expanding window is fitted at once from the shared prefix sums
+    for fit, label, color in [(data.rolling_trend(trend_window), f"Rolling {trend_window}-obs slope", "purple"),
+                              (data.expanding_trend(), "Expanding slope", "gray")]:
+        per_year = fit.slope[lo:hi] * 365
+        valid = ~np.isnan(per_year)
+        x_slope, y_slope = downsample.thin(stats.dates[valid], per_year[valid], n_points, method="minmax", enabled=decimate)
+        ax_slope.plot(x_slope, y_slope, color=color, linewidth=1, label=label)
+    ax_slope.axhline(0, color="black", linewidth=0.8)
+    ax_slope.set_title("Trend Slope Over Time")
+    ax_slope.set_ylabel("Slope (% per year)")
+    ax_slope.legend()
+    ax_slope.grid(True, linestyle='--', alpha=0.6)
+    fig.tight_layout()
     render_fig(fig)
 
+profiler.stop()
+
+if viz == "Annotated Events":
+    shown = events.visible(annotated, events_start, events_end)
+    st.subheader(f"Event windows ({len(shown.dates)} events in view)")
+    st.dataframe(events.frame(shown, event_window))
+
+if viz in ("Rolling Mean (90d) vs Daily", "Volatility (Std Dev)"):
+    # Latest values of each window at the end of the selected range
+    st.dataframe(pd.DataFrame([
+        {"Window": rolling.label(w), "Mean": r.mean[hi - 1], "Std": r.std[hi - 1], "Min": r.min[hi - 1],
+         "Max": r.max[hi - 1], "Z-score": r.zscore[hi - 1]}
+        for w, r in ((w, data.rolling()[w]) for w in rolling_windows)
+    ]).set_index("Window"))
+
 # Downloads and stats
 st.markdown("---")
 col1, col2 = st.columns(2)
 with col1:
-    st.subheader("Yearly Average CSV")
-    csv = annual_avg.to_csv(index=False).encode('utf-8')
-    st.download_button(label="Download yearly averages CSV", data=csv, file_name='Yearly_Average_Inflation_Expectation.csv', mime='text/csv')
+    st.subheader("Download Aggregates")
+    # Serialized once per table, format, range and data version (kept with the rendered figures)
+    table = st.selectbox("Table", exports.TABLES, format_func=lambda t: t.capitalize())
+    fmt = st.radio("Format", exports.available_formats()[::-1], horizontal=True, format_func=str.upper)
+    download_key = ("download", series, date_range, table, fmt, data_version)
+    payload = fig_cache.get(download_key)
+    if payload is None:
+        with profiler.stage("export"):
+            windows = {w: rolling.RollingStats(w, *(a[lo:hi] for a in r[1:])) for w, r in data.rolling().items()}
+            frames = exports.tables(stats, annual_avg, stats.monthly_avg, stats.highest, stats.lowest, windows)
+            payload = exports.to_bytes(frames[table], fmt)
+        fig_cache.put(download_key, payload)
+    file_name = ("Yearly_Average_Inflation_Expectation.csv" if (table, fmt) == ("yearly", "csv")
+                 else f"{series}_{table}{exports.EXTENSIONS[fmt]}")
+    st.download_button(label=f"Download {table} {fmt.upper()}", data=payload, file_name=file_name,
+                       mime=exports.MIME_TYPES[fmt])
 
 with col2:
     st.subheader("Extremes")
-    highest_rate = df.loc[df["Rate"].idxmax()]
-    lowest_rate = df.loc[df["Rate"].idxmin()]
-    st.write(f"Highest: {highest_rate['Rate']:.2f}% on {highest_rate['Date'].date()}")
-    st.write(f"Lowest: {lowest_rate['Rate']:.2f}% on {lowest_rate['Date'].date()}")
+    st.write(f"Highest: {stats.highest.rate:.2f}% on {stats.highest.date.date()}")
+    st.write(f"Lowest: {stats.lowest.rate:.2f}% on {stats.lowest.date.date()}")
+    # Combined from whole years/quarters/months plus the edge days of the aggregate pyramid
+    summary = pyramid.summarize(data.pyramid(), *range_bounds)
+    st.write(f"Mean: {summary.mean:.2f}% (std {summary.std:.2f}) over {summary.count:,} observations")
 
 st.markdown("\n---\n*Source: Federal Reserve Bank of St. Louis — T10YIE*")
+
+if profile:
+    records = profiler.finish(series=series, view=viz, cached=cached_png is not None, data_version=data_version)
+    with st.sidebar.expander("Profiling", expanded=True):
+        st.dataframe(pd.DataFrame(profiling.summary_rows(records)).set_index("Stage"))
+        st.caption("cached figure" if cached_png is not None else "figure drawn this run")
@@ -0,0 +1,154 @@
+#Rolling and expanding linear-regression trends from cumulative sums
+#A RegressionState keeps prefix sums of x, y, x², xy and y² (x = days since the first observation). Any run of
+#rows then has its least-squares line, R² and residual spread from five subtractions, so the fits of every
+#rolling or expanding window come out of a few vectorized array operations in O(n) - instead of a polyfit per
+#window - and appending rows only extends the sums. x is counted from a global origin (the first observation)
+#rather than the epoch, which keeps the x² sums, and the cancellation when centring them, small.
+#Bands use the normal approximation (z instead of Student's t), which is close for the window sizes used here.
+
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+
+#Prefix sums; element i covers rows [0, i)
+Prefix = namedtuple("Prefix", ["sum_x", "sum_y", "sum_xx", "sum_xy", "sum_yy"])
+
+#Fitted lines - scalars for one range, arrays (one per window, NaN before the first full window) otherwise.
+#x_mean and sxx (centred sum of squares of x) are what the confidence bands need
+Trend = namedtuple("Trend", ["n", "slope", "intercept", "r2", "resid_std", "x_mean", "sxx"])
+
+CONFIDENCE = 0.95
+#Forecast horizon past the last observation, in days
+FORECAST_DAYS = 365
+
+
+#Writes values at buf[used:], growing the buffer geometrically so repeated small appends stay O(new rows)
+#amortised; returns the (possibly new) buffer
+def extend_buffer(buf, used, values):
+    needed = used + len(values)
+    if needed > len(buf):
+        bigger = np.empty(max(needed, 2 * len(buf), 64), dtype=buf.dtype)
+        bigger[:used] = buf[:used]
+        buf = bigger
+    buf[used:needed] = values
+    return buf
+
+
+class RegressionState:
+    def __init__(self):
+        self.rows = 0
+        self._x = np.empty(0)
+        self._sums = [np.zeros(1) for _ in Prefix._fields]
+
+    #Adds observations (x must keep increasing); O(len(x))
+    def append(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(x) == 0:
+            return
+        terms = (x, y, x * x, x * y, y * y)
+        for i, term in enumerate(terms):
+            last = self._sums[i][self.rows]
+            self._sums[i] = extend_buffer(self._sums[i], self.rows + 1, last + np.cumsum(term))
+        self._x = extend_buffer(self._x, self.rows, x)
+        self.rows += len(x)
+
+    #Prefix sums of the rows so far. Appends only write past them (or into a new buffer), so a prefix
+    #handed out earlier stays valid
+    def prefix(self):
+        return Prefix(*(s[:self.rows + 1] for s in self._sums))
+
+    def x(self):
+        return self._x[:self.rows]
+
+    def totals(self):
+        p = self.prefix()
+        return (self.rows,) + tuple(float(s[-1]) for s in p)
+
+
+def prefix_sums(x, y):
+    state = RegressionState()
+    state.append(x, y)
+    return state.prefix()
+
+
+#Lines for the row ranges [lo, hi) (arrays)
+def _fit_ranges(prefix, lo, hi):
+    n = (hi - lo).astype(np.float64)
+    sx, sy, sxx, sxy, syy = (s[hi] - s[lo] for s in prefix)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = sx / n
+        cxx = sxx - sx * x_mean
+        cxy = sxy - sx * sy / n
+        cyy = syy - sy * sy / n
+        slope = np.where(cxx > 0, cxy / cxx, 0.0)
+        intercept = sy / n - slope * x_mean
+        sse = np.maximum(cyy - slope * cxy, 0.0)
+        r2 = np.where(cyy > 0, 1 - sse / cyy, np.nan)
+        resid_std = np.sqrt(sse / (n - 2))
+    valid = n >= 2
+    nan = np.nan
+    return Trend(
+        n=n,
+        slope=np.where(valid, slope, nan),
+        intercept=np.where(valid, intercept, nan),
+        r2=np.where(valid, r2, nan),
+        resid_std=np.where(n >= 3, resid_std, nan),
+        x_mean=np.where(valid, x_mean, nan),
+        sxx=np.where(valid, cxx, nan),
+    )
+
+
+#Fit of every `window`-row window, aligned to each window's last row (like pandas rolling)
+def rolling(prefix, x, window):
+    rows = len(x)
+    hi = np.arange(1, rows + 1)
+    lo = np.maximum(hi - window, 0)
+    trend = _fit_ranges(prefix, lo, hi)
+    short = hi < window
+    return Trend(*(np.where(short, np.nan, f) for f in trend))
+
+
+#Fit of rows [0, i] for every row i
+def expanding(prefix, x, min_periods=2):
+    rows = len(x)
+    hi = np.arange(1, rows + 1)
+    trend = _fit_ranges(prefix, np.zeros(rows, dtype=np.int64), hi)
+    return Trend(*(np.where(hi < min_periods, np.nan, f) for f in trend))
+
+
+#Trend (scalars) of one analytics.Regression, e.g. the whole series or a zoomed range
+def from_regression(reg):
+    n = reg.n
+    x_mean = reg.sum_x / n
+    sxx = reg.sum_xx - reg.sum_x * x_mean
+    sxy = reg.sum_xy - reg.sum_x * reg.sum_y / n
+    syy = reg.sum_yy - reg.sum_y * reg.sum_y / n
+    sse = max(syy - reg.slope * sxy, 0.0)
+    return Trend(
+        n=n, slope=reg.slope, intercept=reg.intercept,
+        r2=1 - sse / syy if syy > 0 else float("nan"),
+        resid_std=float(np.sqrt(sse / (n - 2))) if n > 2 else float("nan"),
+        x_mean=x_mean, sxx=sxx,
+    )
+
+
+#Fitted values at x with the confidence band of the line (prediction=False) or of new observations (True)
+#Returns (fitted, lower, upper)
+def band(trend, x, level=CONFIDENCE, prediction=False):
+    x = np.asarray(x, dtype=np.float64)
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    fitted = trend.slope * x + trend.intercept
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spread = 1 / trend.n + (x - trend.x_mean) ** 2 / trend.sxx
+    if prediction:
+        spread = spread + 1
+    half = z * trend.resid_std * np.sqrt(spread)
+    return fitted, fitted - half, fitted + half
+
+
+#The trend carried past last_x: `points` x values up to `days` ahead and their prediction band
+def forecast(trend, last_x, days=FORECAST_DAYS, level=CONFIDENCE, points=50):
+    x = np.linspace(last_x, last_x + days, points)
+    return (x,) + band(trend, x, level, prediction=True)
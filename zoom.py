@@ -0,0 +1,144 @@
+#Date-range zoom over the analytics arrays
+#A ZoomIndex is built once per data version: prefix sums of the rates, their squares and the regression terms,
+#plus a block sparse table for the range maximum/minimum. A date range is then resolved to row offsets with
+#searchsorted, the views get slices of the full arrays (only the range's day offsets are rebased, into a new
+#array), and the range's yearly/monthly means, extremes and regression line come from the prefix sums and the
+#table instead of a pass over the rows.
+
+from collections import namedtuple
+
+import numpy as np
+
+import analytics
+import trends
+
+#Rows per block of the extremes table; a query scans at most two partial blocks
+BLOCK = 256
+
+ZoomIndex = namedtuple("ZoomIndex", [
+    "dates", "rates", "days",
+    "sum_y", "sum_yy", "sum_x", "sum_xx", "sum_xy",
+    "max_table", "min_table",
+])
+
+
+#Levels of a sparse table over per-block argmax positions of sign*values (first occurrence wins on ties)
+def _block_table(values, sign=1):
+    values = sign * values
+    n = len(values)
+    n_blocks = -(-n // BLOCK)
+    padded = np.full(n_blocks * BLOCK, -np.inf)
+    padded[:n] = values
+    level = padded.reshape(n_blocks, BLOCK).argmax(axis=1) + np.arange(n_blocks) * BLOCK
+    table = [level]
+    span = 1
+    while 2 * span <= n_blocks:
+        left, right = level[:len(level) - span], level[span:]
+        level = np.where(values[right] > values[left], right, left)
+        table.append(level)
+        span *= 2
+    return table
+
+
+#Position of the first maximum of sign*values[lo:hi] in O(BLOCK)
+def _range_argmax(values, table, lo, hi, sign=1):
+    lo, hi = int(lo), int(hi)
+    first, last = lo // BLOCK, (hi - 1) // BLOCK
+    if first == last:
+        return lo + int((sign * values[lo:hi]).argmax())
+    edge = (first + 1) * BLOCK
+    candidates = [lo + int((sign * values[lo:edge]).argmax())]
+    inner = last - first - 1
+    if inner > 0:
+        k = inner.bit_length() - 1
+        candidates += [int(table[k][first + 1]), int(table[k][last - (1 << k)])]
+    candidates.append(last * BLOCK + int((sign * values[last * BLOCK:hi]).argmax()))
+    best = candidates[0]
+    for c in candidates[1:]:
+        if sign * values[c] > sign * values[best]:
+            best = c
+    return best
+
+
+#prefix: trends.Prefix of (stats.days, stats.rates) when it is already kept (incremental.SeriesState);
+#rates: the full-precision rates when stats only holds compact ones
+def build_index(stats, prefix=None, rates=None):
+    rates = np.asarray(stats.rates if rates is None else rates, dtype=np.float64)
+    if prefix is None:
+        prefix = trends.prefix_sums(stats.days, rates)
+    return ZoomIndex(
+        dates=stats.dates, rates=rates, days=stats.days,
+        sum_y=prefix.sum_y, sum_yy=prefix.sum_yy,
+        sum_x=prefix.sum_x, sum_xx=prefix.sum_xx, sum_xy=prefix.sum_xy,
+        max_table=_block_table(rates), min_table=_block_table(rates, -1),
+    )
+
+
+#Row offsets [lo, hi) of the observations between start and end (inclusive dates)
+def locate(index, start, end):
+    start = np.datetime64(start, "D")
+    end = np.datetime64(end, "D") + np.timedelta64(1, "D")
+    lo, hi = np.searchsorted(index.dates, np.array([start, end]).astype(index.dates.dtype))
+    return int(lo), int(hi)
+
+
+def _between(prefix, lo, hi):
+    return prefix[hi] - prefix[lo]
+
+
+#Sums and counts per period (numpy datetime unit "Y" or "M") for rows [lo, hi), from the prefix sums
+def _period_sums(index, lo, hi, unit):
+    first = index.dates[lo].astype("datetime64[Y]")
+    last = index.dates[hi - 1].astype("datetime64[Y]")
+    if unit == "M":
+        #Whole years of months, so they reshape to (years x 12)
+        first, last = first.astype("datetime64[M]"), (last + 1).astype("datetime64[M]") - 1
+    edges = np.arange(first, last + 2).astype(index.dates.dtype)
+    bounds = np.clip(np.searchsorted(index.dates, edges), lo, hi)
+    sums = index.sum_y[bounds[1:]] - index.sum_y[bounds[:-1]]
+    counts = np.diff(bounds)
+    return sums, counts
+
+
+def extremes(index, lo, hi):
+    high = _range_argmax(index.rates, index.max_table, lo, hi)
+    low = _range_argmax(index.rates, index.min_table, lo, hi, -1)
+    return (analytics.extreme(index.dates, index.rates, high),
+            analytics.extreme(index.dates, index.rates, low))
+
+
+#Regression over rows [lo, hi) with x measured in days from the range's first observation
+def regression(index, lo, hi):
+    n = hi - lo
+    x0 = float(index.days[lo])
+    sx, sy = _between(index.sum_x, lo, hi), _between(index.sum_y, lo, hi)
+    sxx, sxy = _between(index.sum_xx, lo, hi), _between(index.sum_xy, lo, hi)
+    return analytics.fit_line(
+        n, sx - n * x0, sy, sxx - 2 * x0 * sx + n * x0 * x0, sxy - x0 * sy, _between(index.sum_yy, lo, hi),
+    )
+
+
+#Analytics for rows [lo, hi): arrays are slices of the full ones (the rolling values keep their full-history
+#context), days restart at 0 on the range's first observation (a copy), and the aggregates come from the index
+def window(stats, index, lo, hi):
+    if lo >= hi:
+        raise ValueError("No observations in the selected date range")
+    if lo == 0 and hi == len(stats.rates):
+        return stats
+    first_year = int(stats.years[lo])
+    year_sum, year_count = _period_sums(index, lo, hi, "Y")
+    month_sum, month_count = _period_sums(index, lo, hi, "M")
+    highest, lowest = (e._replace(index=e.index - lo) for e in extremes(index, lo, hi))
+    return analytics.Analytics(
+        dates=stats.dates[lo:hi],
+        rates=stats.rates[lo:hi],
+        days=stats.days[lo:hi] - stats.days[lo],
+        years=stats.years[lo:hi],
+        rolling_mean=stats.rolling_mean[lo:hi],
+        volatility=stats.volatility[lo:hi],
+        annual_avg=analytics.annual_frame(first_year, year_sum, year_count),
+        monthly_avg=analytics.monthly_frame(first_year, month_sum.reshape(-1, 12), month_count.reshape(-1, 12)),
+        highest=highest,
+        lowest=lowest,
+        regression=regression(index, lo, hi),
+    )